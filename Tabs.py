@@ -1,9 +1,13 @@
 from abc import ABC, abstractmethod
 import tkinter as tk
 from tkinter import ttk
-from tkinter import font as tkFont
-import temp_query as query
-import bcrypt
+import query
+from text_layout import layout
+from skill_picker import SkillPicker
+import ui_fonts
+import auth
+from prefetch import loader
+from resize import scheduler
 
 class AbstractTab(ABC):
     def __init__(self, parent, button, tab_canvas, classkeys, select = False):
@@ -18,7 +22,8 @@ class AbstractTab(ABC):
         if parent.winfo_width() > 1000: self.width = parent.winfo_width()
         self.height = 500
         if parent.winfo_height() > 500: self.height = parent.winfo_height()
-        self.frame.bind("<Configure>", lambda event: self.update_tab() if self.notebook.select() == str(self.frame) else None)
+        #A burst of resizes is laid out once, when Tk is idle
+        self.frame.bind("<Configure>", lambda event: scheduler.request(self, self.relayout))
         parent.add(self.frame, text=button.cget("text"))
         if select: self.select_tab()
         self.create_styles()
@@ -77,7 +82,14 @@ class AbstractTab(ABC):
         return True
 
     def create_rounded_rectangle(self, canvas, x1, y1, x2, y2, corner_radius, **kwargs):
-        canvas.create_polygon(
+        return canvas.create_polygon(
+            self.rounded_rectangle_points(x1, y1, x2, y2, corner_radius),
+            smooth=True,
+            **kwargs
+        )
+
+    def rounded_rectangle_points(self, x1, y1, x2, y2, corner_radius):
+        return [
             x1 + corner_radius, y1,
             x1 + corner_radius, y1,
             x2 - corner_radius, y1,
@@ -99,37 +111,25 @@ class AbstractTab(ABC):
             x1, y1 + corner_radius,
             x1, y1,
             x1 + corner_radius, y1,
-            smooth=True,
-            **kwargs
-        )
+        ]
 
-    def wrap_text(self, text, font, max_width, max_lines = None):
-        if font == "":
-            font = tkFont.Font(font="TkDefaultFont")
+    def place_item(self, canvas, items, index, create, coords, **kwargs):
+        """
+        Moves and changes items[index] if it already exists, otherwise it is made with create and added to items
+        This lets the same canvas items be reused instead of deleting them and making new ones
+        """
+        if index < len(items):
+            canvas.coords(items[index], *coords)
+            canvas.itemconfig(items[index], state='normal', **kwargs)
+        else:
+            items.append(create(*coords, **kwargs))
 
-        lines = []
-        words = text.split()
-        
-        while words:
-            line = ''
-            while words and font.measure(line + words[0]) <= max_width:
-                line += (words.pop(0) + ' ')
-            lines.append(line)
-        if max_lines != None and len(lines) > max_lines:
-            lines = lines[0:max_lines]
-            lines[max_lines-1] = lines[max_lines-1][0:-1]
-            lines[max_lines-1] += "..."
-        if len(lines) == 1: lines = lines[0]
-        return lines
+    def wrap_text(self, text, font, max_width, max_lines = None):
+        #The wrapping is remembered so drawing the same text again doesn't measure anything
+        return layout.wrap(text, font, max_width, max_lines)
 
     def get_longest(self, texts, font = ""):
-        if font == "":
-            font = tkFont.Font(font="TkDefaultFont")
-        longest_length = 0
-        for text in texts:
-            text_width = font.measure(text)
-            longest_length = max(longest_length, text_width)
-        return longest_length
+        return layout.longest(texts, font)
     
     def on_mousewheel(self,event, canvas, dir = 'y'):
         """
@@ -145,12 +145,8 @@ class AbstractTab(ABC):
         #print(var.get())
         pass
 
-    def get_selected(self, checkbutton_vars):
-        selected = []
-        for key, value in checkbutton_vars.items():
-            if value.get() != 0:
-                selected.append(key)
-        return selected
+    def get_selected(self, picker):
+        return picker.get_selected()
 
     def unbind_mousewheel_from_children(self, widget):
         """Recursively unbind an event from a widget and its children."""
@@ -164,105 +160,19 @@ class AbstractTab(ABC):
             self.bind_mousewheel(child, canvas, dir)
 
     def checkbox(self, parent, options, height = 200, width = 300, print_sel = True, sel_label = "You've Selected: "):
-        def on_frame_configure(event):
-            canvas.configure(scrollregion=canvas.bbox("all"))
-            canvas.itemconfig(frame_id, width=event.width)
-
-        def on_search(*args):
-            query = search_var.get().lower()
-            for checkbutton, option in zip(checkbuttons, options):
-                if query in option.lower():
-                    checkbutton.pack(anchor='w', padx=10, pady=2)
-                else:
-                    checkbutton.pack_forget()
-            frame.update_idletasks()
-            canvas.config(scrollregion=canvas.bbox("all"))
-        
-        def print_selection(*args):
-            for line in printed_sel:
-                line.place_forget()
-            printed_sel.clear()
-            text = ""
-            for skill in self.get_selected(checkbutton_vars):
-                if text == "":
-                    text = sel_label + skill
-                else:
-                    text += ", " + skill
-            text = self.wrap_text(text, "", width-framewidth)
-            if isinstance(text, list):
-                spacing = 0
-                for line in text:
-                    temp = tk.Label(canvas, text=line, bg='#241E2B', fg='white')
-                    temp.place(x= framewidth, y = spacing)
-                    printed_sel.append(temp)
-                    spacing += 20
-            else:
-                temp = tk.Label(canvas, text=text, bg='#241E2B', fg='white')
-                temp.place(x= framewidth, y = 0)
-                printed_sel.append(temp)
-
-        def add_option():
-            if search_var.get() not in options:
-                var = tk.IntVar()
-                var.trace_add('write', print_selection)
-                checkbutton = tk.Checkbutton(frame, 
-                                            text=search_var.get(), 
-                                            variable=var, 
-                                            bg='#241E2B', 
-                                            fg='#FFF', 
-                                            selectcolor='#000',
-                                            activebackground='#241E2F')
-                checkbutton.pack(anchor='w', padx=10, pady=2)
-                checkbutton_vars[search_var.get()] = var
-                checkbuttons.append(checkbutton)
-                options.append(search_var.get())
-            if checkbutton_vars[search_var.get()].get() == 0:
-                checkbutton_vars[search_var.get()].set(1)
-            else:
-                checkbutton_vars[search_var.get()].set(0)
-
-        printed_sel = []
-        framewidth = width
-        if print_sel:
-            framewidth = self.get_longest(options)+ 25
-            if width/2 > framewidth:
-                framewidth = width/2
-
-        # Entry for searching
-        search_var = tk.StringVar()
-        search_var.trace_add('write', on_search)
-        entry = tk.Entry(parent, textvariable=search_var, bg='#241E2B', fg='#FFF')
-        entry.pack(pady=0, padx=(0, width- framewidth), fill=tk.X)
-        entry.bind("<Return>", lambda event: add_option())
-
-        # Create a Canvas
-        canvas = tk.Canvas(parent, bg='#241E2B', borderwidth=0, highlightthickness=0, height=height, width = width)
-        canvas.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
-
-        # Create a frame to hold the Checkbuttons and add it to the Canvas
-        frame = tk.Frame(canvas, bg='#241E2B', borderwidth=0, highlightthickness=0)
-        frame_id = canvas.create_window((0,0), window=frame, anchor='nw', width= framewidth)
-
-        # Populate the frame with Checkbuttons
-        checkbutton_vars = {}
-        checkbuttons = []
-        for option in options:
-            var = tk.IntVar()
-            var.trace_add('write', print_selection)
-            checkbutton = tk.Checkbutton(frame, 
-                                        text=option, 
-                                        variable=var, 
-                                        bg='#241E2B', 
-                                        fg='#FFF', 
-                                        selectcolor='#000',
-                                        activebackground='#241E2F')
-            checkbutton.pack(anchor='w', padx=0, pady=2)
-            checkbutton_vars[option] = var
-            checkbuttons.append(checkbutton)
-
-        frame.bind("<Configure>", on_frame_configure)
-        self.bind_mousewheel(frame, canvas)
-        return checkbutton_vars
+        """
+        Makes a searchable list of options to tick, only the rows in view are drawn
+
+        return: picker: Pass it to get_selected to find what was ticked
+        type: SkillPicker
+        """
+        picker = SkillPicker(parent, options, height, width, print_sel, sel_label)
+        return picker
+
+    def relayout(self):
+        #Only the tab that can be seen is laid out, a hidden tab gets its own <Configure> once it is shown
+        if self.notebook.select() == str(self.frame):
+            self.update_tab()
 
     @abstractmethod
     def update_tab(self):
@@ -271,9 +181,21 @@ class AbstractTab(ABC):
         self.select_tab()
 
 class ExploreTab(AbstractTab):
+    #Every project card is the same height so where a card goes can be worked out from its index
+    PROJECT_HEIGHT = 92
+    PROJECT_GAP = 10
+    #How many cards above and below the view are kept drawn
+    OVERSCAN = 3
+    SEARCH_PLACEHOLDER = "🔍 Search For Projects"
+    #How long to wait after the last keystroke before searching, in milliseconds
+    SEARCH_DELAY = 150
+
     def __init__(self, parent, button, tab_canvas, classkeys, select = False):
         super().__init__(parent, button, tab_canvas, classkeys, select)
         self.selected = None
+        self.selected_index = None
+        self.selected_tasks = []
+        self.selected_drawn = False
 
         if not hasattr(self, "user"): 
             self.user = None
@@ -291,7 +213,7 @@ class ExploreTab(AbstractTab):
 
         # Create a StringVar for your entry
         entry_var = tk.StringVar()
-        entry_var.set("🔍 Search For Projects")  # initial value
+        entry_var.set(self.SEARCH_PLACEHOLDER)  # initial value
 
         # Set a trace on the StringVar
         entry_var.trace_add("write", lambda *args: self.on_var_change(entry_var))
@@ -301,11 +223,27 @@ class ExploreTab(AbstractTab):
 
         self.main_canvas = tk.Canvas(canvas, bg='#241E2B', bd=0, highlightthickness=0, width=1000)
         self.main_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(20, 0))
-        self.projects = query.get_projects(self.user)
+        #Projects are fetched a page at a time as the user scrolls down
+        self.page_size = 50
+        self.search_text = ""
+        self.search_job = None
+        self.projects = []
+        self.infos = {}
+        self.last_page = False
+        #Pages and tasks are read on background threads, a search makes the pages still loading stale
+        self.loading = None
+        self.generation = 0
+        self.task_futures = {}
+        self.tasks_loading = False
+        self.loading_item = None
+        #Only the cards in view have canvas items, cards that leave the view go to the pool to be reused
+        self.cards = {}
+        self.pool = []
+        self.request_page()
         self.display_all_proj()
         self.main_canvas.bind("<Button-1>", lambda event: self.click(event))
-        self.entry.bind("<FocusIn>", lambda event: self.remove_placeholder(self.entry, "🔍 Search For Projects"))
-        self.entry.bind("<FocusOut>", lambda event: self.restore_placeholder(self.entry, "🔍 Search For Projects"))
+        self.entry.bind("<FocusIn>", lambda event: self.remove_placeholder(self.entry, self.SEARCH_PLACEHOLDER))
+        self.entry.bind("<FocusOut>", lambda event: self.restore_placeholder(self.entry, self.SEARCH_PLACEHOLDER))
 
     def update_tab(self):
         super().update_tab()
@@ -314,53 +252,68 @@ class ExploreTab(AbstractTab):
             self.width = self.frame.winfo_width()
             self.entry.pack(side='left', padx=(self.width-500 , 10))
             self.display_all_proj()
+        else:
+            self.render()
 
-    def display_project(self, project, y= 0):
+    def display_project(self, project, info, y= 0, items= None):
         """
         This Method Creates a Project that is well visualized and shows all important pieces of data for the Project
 
-        param: canvas: This is a tk object that this project should be placed into
-        type: tk.Canvas
+        param: project: This is the (Proj_id, name) pair of the project
+        type: tuple
 
-        param: project: This is the name of the project but might soon be changed to Proj_id
-        type: String
+        param: info: This is the data of the project from query.projects_info
+        type: query.ProjectInfo
 
         param: y: this is the y location that this project display should be placed at
         type: int
+
+        param: items: The canvas items of a card that is being reused, they are moved and changed
+        to show this project instead of making new ones. New items are added to the list if it is empty
+        type: list
+
+        return: y: This is the bottom of the project, always PROJECT_HEIGHT below where it started
+        type: int
         """
-        #Making project name into a single tagable name
-        project = project.replace(" ", "_")
+        if items is None: items = []
+        canvas = self.main_canvas
+        top = y
+        #Making the project id into a single tagable name
+        tag = "proj_" + str(project[0])
+        name = project[1]
+        age = "Unknown" if info.age is None else str(info.age)
 
         #Determining how much space to give on the right side
-        font = tkFont.Font(font=("Arial", 12, 'bold'))
-        right_offset = self.get_longest(["Contributors: " + query.project_info()[3], "Project Age: " + query.project_info()[4], "Completed Tasks: " + query.project_info()[2]],font)+50
+        font = ui_fonts.get("heading")
+        right_offset = self.get_longest(["Contributors: " + str(info.contributors), "Project Age: " + age, "Completed Tasks: " + str(info.completed)],font)+50
 
         #Creating background for the project
-        self.create_rounded_rectangle(self.main_canvas, 10, y, self.width-40, y+90, 20, outline= '#FFFFFF', fill='#18141C', tag=project)
+        self.place_item(canvas, items, 0, canvas.create_polygon, self.rounded_rectangle_points(10, y, self.width-40, y+90, 20), smooth=True, outline= '#FFFFFF', fill='#18141C', tags=(tag, 'card'))
         y+= 20
 
         #font for measurement
-        font = tkFont.Font(font=("Arial", 18, 'bold', 'underline'))
+        font = ui_fonts.get("title")
         #Writing Project Name
-        self.main_canvas.create_text(20, y, text = project.replace("_", " "), anchor='w', font=font, tag=[project, 'header'], fill='#69D7FF')
+        self.place_item(canvas, items, 1, canvas.create_text, (20, y), text = name, anchor='w', font=font, tags=(tag, 'header', 'card'), fill='#69D7FF')
         #Writing Incomplete Tasks
-        self.main_canvas.create_text(font.measure(project) + 50, y+5, text = "Incomplete Tasks: " + query.project_info()[1], anchor='w', font=("Arial", 12, 'bold'), tag=project, fill='#69D7FF')
+        self.place_item(canvas, items, 2, canvas.create_text, (layout.measure(font, name) + 50, y+5), text = "Incomplete Tasks: " + str(info.uncompleted), anchor='w', font=ui_fonts.get("heading"), tags=(tag, 'card'), fill='#69D7FF')
         #Writing Amount of Contributors
-        self.main_canvas.create_text(self.width-right_offset, y, text = "Contributors: " + query.project_info()[3], anchor='w', font=("Arial", 12, 'bold'), tag=project, fill = '#69D7FF')
+        self.place_item(canvas, items, 3, canvas.create_text, (self.width-right_offset, y), text = "Contributors: " + str(info.contributors), anchor='w', font=ui_fonts.get("heading"), tags=(tag, 'card'), fill = '#69D7FF')
         #Writing the Projects Age
-        self.main_canvas.create_text(self.width-right_offset, y+25, text = "Project Age: " + query.project_info()[4], anchor='w', font=("Arial", 12, 'bold'), tag=project, fill = '#69D7FF')
+        self.place_item(canvas, items, 4, canvas.create_text, (self.width-right_offset, y+25), text = "Project Age: " + age, anchor='w', font=ui_fonts.get("heading"), tags=(tag, 'card'), fill = '#69D7FF')
         #Writing amount of tasks completed
-        self.main_canvas.create_text(self.width-right_offset, y+50, text = "Completed Tasks: " + query.project_info()[2], anchor='w', font=("Arial", 12, 'bold'), tag=project, fill = '#69D7FF')
+        self.place_item(canvas, items, 5, canvas.create_text, (self.width-right_offset, y+50), text = "Completed Tasks: " + str(info.completed), anchor='w', font=ui_fonts.get("heading"), tags=(tag, 'card'), fill = '#69D7FF')
 
         #shifting down to write the description
         y+= 32
         #Wrapping the text for the description into 2 lines
-        wrapped_text = self.wrap_text(query.project_info()[0], tkFont.Font(font=("Arial", 12)), self.width-right_offset -50, 2)
-        #Looping to write it down
-        for line in wrapped_text:
-            self.main_canvas.create_text(20, y, text=line, anchor='w', font=("Arial", 12), tag=project, fill = '#1193C2')
+        wrapped_text = self.wrap_text(info.description, ui_fonts.get("body"), self.width-right_offset -50, 2)
+        if isinstance(wrapped_text, str): wrapped_text = [wrapped_text]
+        #Always writing 2 lines so every card has the same items
+        for i, line in enumerate((wrapped_text + ["", ""])[0:2]):
+            self.place_item(canvas, items, 6+i, canvas.create_text, (20, y), text=line, anchor='w', font=ui_fonts.get("body"), tags=(tag, 'card'), fill = '#1193C2')
             y += 20
-        return y
+        return top + self.PROJECT_HEIGHT
 
     def display_task(self, canvas, task, y =0):
         """
@@ -369,8 +322,8 @@ class ExploreTab(AbstractTab):
         param: canvas: This determines what canvas to draw onto
         type: tk.Canvas
 
-        param: tasks: This is the Primary key of the task from the database
-        type: int
+        param: tasks: This is the data of the task from query.project_tasks
+        type: query.TaskInfo
 
         param: y: This is determines the y axis location to draw onto
         type: int
@@ -378,79 +331,232 @@ class ExploreTab(AbstractTab):
         return: y: This is the bottom of the task so it can easily be passed on and not be drawn onto
         type: int    
         """
+        tag = "task_"+str(task.id)
         #Clearing this task so just in case it doesnt ever have 2 versions
-        canvas.delete("task_"+str(task))
+        canvas.delete(tag)
 
-        font = tkFont.Font(font=("Arial", 10, 'bold')) #most used font
+        font = ui_fonts.get("small") #most used font
 
         #Determining how much space to give on the right side
-        right_offset = self.get_longest(["Assigned to: " + query.task_info(task)[4], "Deadline: " +  query.task_info(task)[3]],font) +60
+        right_offset = self.get_longest(["Assigned to: " + task.assigned, "Deadline: " +  task.deadline],font) +60
 
         #Determining how much space there is to write the required skills
-        skill_space = self.width - right_offset - tkFont.Font(font=("Arial", 12, 'bold')).measure(query.task_info(task)[0]) -100
-        skill = self.wrap_text("Required Skills: " + query.task_info(task)[2], font, skill_space, 1)
+        title_width = layout.measure(ui_fonts.get("heading"), task.task)
+        skill_space = self.width - right_offset - title_width -100
+        skill = self.wrap_text("Required Skills: " + task.required_skills, font, skill_space, 1)
 
         #Creating the Task background
-        self.create_rounded_rectangle(canvas, 20, y, self.width-50, y+50, 15, outline= '#FFFFFF', fill='#18141C', tag="task_"+str(task))
+        self.create_rounded_rectangle(canvas, 20, y, self.width-50, y+50, 15, outline= '#FFFFFF', fill='#18141C', tag=tag)
         
         y+= 15 # Moving down to the first line of text
         #Writing Task Name
-        canvas.create_text(30, y, text = query.task_info(task)[0], anchor='w', font=("Arial", 12, 'bold'), tag="task_"+str(task), fill = '#FFFFFF')
+        canvas.create_text(30, y, text = task.task, anchor='w', font=ui_fonts.get("heading"), tag=tag, fill = '#FFFFFF')
         #Writing Assigned User 
-        canvas.create_text(self.width-right_offset, y, text = "Assigned to: " + query.task_info(task)[4], anchor='w', font=font, tag="task_"+str(task), fill = '#FFFFFF')
+        canvas.create_text(self.width-right_offset, y, text = "Assigned to: " + task.assigned, anchor='w', font=font, tag=tag, fill = '#FFFFFF')
         #Writng the Required Skills
-        canvas.create_text(tkFont.Font(font=("Arial", 12, 'bold')).measure(query.task_info(task)[0])+ 50, y, text = skill, anchor='w', font=font, tag="task_"+str(task), fill = '#FFFFFF')
+        canvas.create_text(title_width+ 50, y, text = skill, anchor='w', font=font, tag=tag, fill = '#FFFFFF')
 
         y+= 20 #Moving down to second line of text
         #Wrinting down the task description
-        canvas.create_text(30, y, text = self.wrap_text(query.task_info(task)[1], font, self.width-right_offset -140, 1), anchor='w', font=font, tag="task_"+str(task), fill = '#FFFFFF')
+        canvas.create_text(30, y, text = self.wrap_text(task.description, font, self.width-right_offset -140, 1), anchor='w', font=font, tag=tag, fill = '#FFFFFF')
         #Writing the deadline down
-        canvas.create_text(self.width-right_offset, y, text = "Deadline: " +  query.task_info(task)[3], anchor='w', font=font, tag="task_"+str(task), fill = '#FFFFFF')
+        canvas.create_text(self.width-right_offset, y, text = "Deadline: " +  task.deadline, anchor='w', font=font, tag=tag, fill = '#FFFFFF')
 
         y+= 15 #moving the y to the bottom of the task section 
         return y
 
-    def display_proj_tasks(self, project, y = 0):
-        #This allows the tags to work well while allowing users to have spaces in their project names
-        project = project.replace(" ", "_")
-
-        #cuts the tasks amount down to a max of 4
-        tasks = query.project_tasks(project)
-        if len(tasks) > 4: tasks = tasks[0:4]
-
-        #Creates the "Dropdown"
-        self.create_rounded_rectangle(self.main_canvas, 10, y, self.width-40, y + 95 + len(tasks)*55, 20, outline= '#FFFFFF', fill='#3B3147', tag="taskdrop")
+    def display_proj_tasks(self, project, info, tasks, y = 0):
+        #Creates the "Dropdown", while the tasks are loading there is room for one row saying so
+        rows = len(tasks) if not self.tasks_loading else 1
+        self.create_rounded_rectangle(self.main_canvas, 10, y, self.width-40, y + 95 + rows*55, 20, outline= '#FFFFFF', fill='#3B3147', tag=("taskdrop", "selected"))
 
         #Displays the Project
-        y = self.display_project(project, y)
+        items = []
+        y = self.display_project(project, info, y, items)
+        for item in items:
+            self.main_canvas.addtag_withtag("selected", item)
         spacing = 5
+        if self.tasks_loading:
+            self.main_canvas.create_text(30, y + spacing + 25, text="Loading tasks...", anchor='w', font=ui_fonts.get("small"), fill='#FFFFFF', tag=("taskdrop", "selected"))
         #Display the Tasks
         for task in tasks:
             y = self.display_task(self.main_canvas, task, y +spacing)
+            self.main_canvas.addtag_withtag("selected", "task_"+str(task.id))
         y += 5
         return y
 
-    def display_all_proj(self, y = 0):
+    def dropdown_height(self):
+        """
+        How much further down the selected project pushes the projects under it
+        """
+        if self.selected_index is None:
+            return 0
+        if self.tasks_loading:
+            return 5 + 55
+        return 5 + len(self.selected_tasks)*55
+
+    def card_top(self, index):
+        top = self.PROJECT_GAP + index * (self.PROJECT_HEIGHT + self.PROJECT_GAP)
+        if self.selected_index is not None and index > self.selected_index:
+            top += self.dropdown_height()
+        return top
+
+    def card_at(self, y):
         """
-        This function displays all projects and whichever projects tasks that are selected
+        Gives the index of the card at the y location of the canvas
         """
-        self.main_canvas.delete('all')
+        if self.selected_index is not None and y >= self.card_top(self.selected_index + 1):
+            y -= self.dropdown_height()
+        return max(0, int(y // (self.PROJECT_HEIGHT + self.PROJECT_GAP)))
+
+    def display_all_proj(self):
+        """
+        This function displays the projects in view and whichever projects tasks that are selected
+        Every card is laid out again, reusing the canvas items that are already there
+        """
+        self.main_canvas.delete('NoProj')
+        for index in list(self.cards):
+            self.hide_card(index)
+        self.main_canvas.delete('selected')
+        self.selected_drawn = False
         if self.projects == []:
-            text = self.wrap_text(self.noProjects, tkFont.Font(font=("Arial", 20, 'bold')), self.width-200)
+            if self.loading is not None:
+                message = "Loading projects..."
+            elif self.search_text == "":
+                message = self.noProjects
+            else:
+                message = "No projects match your search"
+            text = self.wrap_text(message, ui_fonts.get("notice"), self.width-200)
             i = 0
             if isinstance(text, str): text = [text]
             for line in text:
-                self.main_canvas.create_text(self.width/2, 150+i, text= line, fill="white", anchor='c', font=("Arial", 20, 'bold'), tag='NoProj')
+                self.main_canvas.create_text(self.width/2, 150+i, text= line, fill="white", anchor='c', font=ui_fonts.get("notice"), tag='NoProj')
                 i+= 30
+            self.main_canvas.config(scrollregion=(0, 0, self.width, 0))
+            return
+        self.render()
+
+    def hide_card(self, index):
+        items = self.cards.pop(index)
+        for item in items:
+            self.main_canvas.itemconfig(item, state='hidden')
+        self.pool.append(items)
+
+    def render(self):
+        """
+        Makes sure the cards in view, and OVERSCAN cards above and below it, are drawn
+        Cards that left that range are hidden and their items are reused for the cards coming into it
+        """
+        if self.projects == []:
+            return
+        canvas = self.main_canvas
+        top = canvas.canvasy(0)
+        height = canvas.winfo_height() if canvas.winfo_height() > 1 else self.height
+        first = max(0, self.card_at(top) - self.OVERSCAN)
+        last = self.card_at(top + height) + self.OVERSCAN
+        #The next page is asked for before the view reaches the end of the loaded projects
+        if last + self.page_size // 2 >= len(self.projects):
+            self.request_page()
+        last = min(last, len(self.projects) - 1)
+
+        for index in list(self.cards):
+            if index < first or index > last or index == self.selected_index:
+                self.hide_card(index)
+        for index in range(first, last + 1):
+            if index == self.selected_index or index in self.cards:
+                continue
+            project = self.projects[index]
+            items = self.pool.pop() if self.pool else []
+            self.display_project(project, self.infos.get(project[0], query.ProjectInfo("", 0, 0, 0, None)), self.card_top(index), items)
+            self.cards[index] = items
+            #A project that comes into view may be opened next, so its tasks are read ahead of time
+            self.prefetch_tasks(project[0])
+
+        #The selected project is drawn with its tasks while it is in view
+        if self.selected_index is not None and first <= self.selected_index <= last:
+            if not self.selected_drawn:
+                project = self.projects[self.selected_index]
+                self.display_proj_tasks(project, self.infos.get(project[0], query.ProjectInfo("", 0, 0, 0, None)), self.selected_tasks, self.card_top(self.selected_index))
+                self.selected_drawn = True
+        elif self.selected_drawn:
+            canvas.delete('selected')
+            self.selected_drawn = False
+
+        #The scroll region covers every loaded project even though only some are drawn,
+        #with a line under them while the next page is loading
+        bottom = self.card_top(len(self.projects))
+        if self.loading is not None:
+            if self.loading_item is None:
+                self.loading_item = canvas.create_text(self.width/2, bottom + 20, text="Loading more projects...", fill="white", anchor='c', font=ui_fonts.get("small"))
+            canvas.coords(self.loading_item, self.width/2, bottom + 20)
+            canvas.itemconfig(self.loading_item, state='normal')
+            bottom += 40
+        elif self.loading_item is not None:
+            canvas.itemconfig(self.loading_item, state='hidden')
+        canvas.config(scrollregion=(0, 0, self.width, bottom))
+
+    def request_page(self):
+        """
+        Starts reading the page of projects after the last one that is loaded, page_loaded gets it
+        Nothing happens if a page is already loading or there are no more
+        """
+        if self.last_page or self.loading is not None:
+            return
+        after = self.projects[-1][0] if self.projects else None
+        generation = self.generation
+        self.loading = loader.submit(self.fetch_page, self.search_text, self.user, len(self.projects), after)
+        self.loading.add_done_callback(lambda future: self.page_loaded(generation, future))
+
+    def fetch_page(self, search_text, user, offset, after):
+        """
+        Runs on a background thread
+
+        return: page, infos: The (Proj_id, name) pairs of the page and their query.ProjectInfo by id
+        type: tuple
+        """
+        if search_text != "":
+            #Search results are ranked instead of in id order so they are paged by position
+            page = query.cache.search_projects(search_text, user, self.page_size, offset)
         else:
-            for project in self.projects:
-                if project == self.selected:
-                    y = self.display_proj_tasks(project, y+10)
-                else:
-                    y = self.display_project(project, y+10)
-        self.main_canvas.update()   
-        #After creating the projects making sure the scrolling region is set right
-        self.main_canvas.config(scrollregion=self.main_canvas.bbox(tk.ALL))
+            page = query.cache.get_projects(user, after, self.page_size)
+        return page, query.cache.projects_info([project[0] for project in page])
+
+    def page_loaded(self, generation, future):
+        if generation != self.generation:
+            return
+        self.loading = None
+        try:
+            page, infos = future.result()
+        except Exception as e:
+            print(e)
+            self.last_page = True
+            page, infos = [], {}
+        else:
+            self.last_page = len(page) < self.page_size
+        first = self.projects == []
+        self.projects += page
+        self.infos.update(infos)
+        self.update_scrolling()
+        if first:
+            self.display_all_proj()
+        else:
+            self.render()
+
+    def prefetch_tasks(self, project):
+        """
+        Reads the tasks of a project on the background thread so opening it is instant
+        """
+        if project not in self.task_futures:
+            if len(self.task_futures) >= 1000:
+                self.task_futures.clear()
+            future = loader.submit(query.cache.project_tasks, project, None, 4, background=True)
+            if future is not None:
+                self.task_futures[project] = future
+        return self.task_futures.get(project)
+
+    def scroll(self, event):
+        self.on_mousewheel(event, self.main_canvas)
+        self.render()
 
     def click(self, event):
         # Get the current item under the mouse pointer
@@ -463,23 +569,124 @@ class ExploreTab(AbstractTab):
         # Retrieve all tags of the clicked item
         tags = self.main_canvas.gettags(current_item[0])
         
-        # Reconstruct the name from the tags
-        name = " ".join(tag for tag in tags if tag != "current")
-        if name == "taskdrop": 
+        # Find the project the item belongs to
+        project = next((tag for tag in tags if tag.startswith("proj_")), None)
+        if "taskdrop" in tags: 
             pass
-        elif name.startswith("task_"):
+        elif any(tag.startswith("task_") for tag in tags):
             pass
-        else:
-            name = name.replace("_", " ")
-            self.main_canvas.delete('all')
-            if name == self.selected:
-                self.selected = None
-            else:
-                self.selected = name.replace("_", " ")
-            self.display_all_proj()
-        #elif name.endswith("header"):
+        elif project is not None:
+            project = int(project[len("proj_"):])
+            index = next((index for index, items in self.cards.items() if current_item[0] in items), None)
+            if project == self.selected:
+                self.collapse()
+            elif index is not None:
+                self.collapse()
+                self.expand(index, project)
+        #elif "header" in tags:
         #    print("Open Project Tab")
 
+    def shift_below(self, index, dy):
+        """
+        Moves the drawn cards after the card at index up or down by dy
+        Every item of a card is tagged with its project, so items wider than the canvas move too
+        """
+        for below in self.cards:
+            if below > index:
+                self.main_canvas.move("proj_" + str(self.projects[below][0]), 0, dy)
+
+    def expand(self, index, project):
+        """
+        Opens the task dropdown of a project, only the dropdown is drawn and the cards under it are moved down
+        """
+        #Tasks read ahead of time are in the query cache, otherwise the dropdown says they are loading
+        #while a worker reads them, the database is never read here
+        self.prefetch_tasks(project)
+        tasks = query.cache.peek_project_tasks(project, limit=4)
+        self.selected = project
+        self.selected_index = index
+        self.tasks_loading = tasks is None
+        self.selected_tasks = [] if self.tasks_loading else tasks
+        self.shift_below(index, self.dropdown_height())
+
+        if index in self.cards:
+            self.hide_card(index)
+        info = self.infos.get(project, query.ProjectInfo("", 0, 0, 0, None))
+        self.display_proj_tasks(self.projects[index], info, self.selected_tasks, self.card_top(index))
+        self.selected_drawn = True
+        self.render()
+        if self.tasks_loading:
+            future = loader.submit(query.cache.project_tasks, project, None, 4, key=("tasks", project))
+            future.add_done_callback(lambda future: self.tasks_loaded(project, future))
+
+    def tasks_loaded(self, project, future):
+        """
+        Puts the tasks into the open dropdown once they are read, the cards under it are moved to make room
+        """
+        if self.selected != project or not self.tasks_loading:
+            return
+        try:
+            tasks = future.result()
+        except Exception as e:
+            print(e)
+            tasks = []
+        old = self.dropdown_height()
+        self.tasks_loading = False
+        self.selected_tasks = tasks
+        self.shift_below(self.selected_index, self.dropdown_height() - old)
+        self.main_canvas.delete('selected')
+        self.selected_drawn = False
+        self.render()
+
+    def collapse(self):
+        """
+        Closes the open task dropdown, the cards under it are moved back up
+        """
+        if self.selected is None:
+            return
+        dy = self.dropdown_height()
+        index = self.selected_index
+        self.main_canvas.delete('selected')
+        self.selected_drawn = False
+        self.selected = None
+        self.selected_index = None
+        self.selected_tasks = []
+        self.tasks_loading = False
+        self.shift_below(index, -dy)
+        self.render()
+
+    def on_var_change(self, var):
+        """
+        The search runs once the user stops typing for SEARCH_DELAY instead of on every keystroke
+        """
+        if self.search_job is not None:
+            self.frame.after_cancel(self.search_job)
+        self.search_job = self.frame.after(self.SEARCH_DELAY, lambda: self.search(var.get()))
+
+    def search(self, text):
+        """
+        Shows only the projects matching the text, or every project again if it is empty
+        """
+        self.search_job = None
+        if text == self.SEARCH_PLACEHOLDER:
+            text = ""
+        text = text.strip()
+        if text == self.search_text:
+            return
+        self.search_text = text
+        self.selected = None
+        self.selected_index = None
+        self.selected_tasks = []
+        self.tasks_loading = False
+        self.projects = []
+        self.last_page = False
+        #A page of the last search that is still loading is thrown away when it arrives
+        self.generation += 1
+        self.loading = None
+        self.request_page()
+        self.main_canvas.yview_moveto(0)
+        self.display_all_proj()
+
     def remove_placeholder(self, entry, placeholder):
         if entry.get() == placeholder:
             entry.delete(0, tk.END)
@@ -492,7 +699,7 @@ class ExploreTab(AbstractTab):
         if len(self.projects)*100 < self.height-80:
             self.main_canvas.unbind("<MouseWheel>")
         else:
-            self.main_canvas.bind("<MouseWheel>", lambda event, canvas=self.main_canvas: self.on_mousewheel(event, canvas))
+            self.main_canvas.bind("<MouseWheel>", lambda event: self.scroll(event))
 
 class UserProjectsTab(ExploreTab):
     def __init__(self, parent, button, tab_canvas, classkeys, select=False):
@@ -515,6 +722,7 @@ class LoginTab(AbstractTab):
         self.canvas = tk.Canvas(self.frame, bg='#241E2B', bd=0, highlightthickness=0, width=self.width)
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
+        self.logging_in = False
         self.fail_label = tk.Label(self.canvas, text="", bg='#241E2B', fg='red', font=('Arial', 12))
         self.fail_label.place(rely= 0.3, x= self.width/2 -50)
 
@@ -549,7 +757,15 @@ class LoginTab(AbstractTab):
         signup_button.bind("<Button-1>", lambda event: self.create_tab("Sign Up", SignUpTab, True))     
 
     def on_submit(self):
-        user = query.verify_user(self.user.get(), self.password.get())
+        #Checking the password takes a while, it runs off the Tk thread and on_login gets the answer
+        if self.logging_in:
+            return
+        self.logging_in = True
+        self.fail_label.config(text="Logging in...")
+        auth.service.login(self.user.get(), self.password.get(), self.on_login)
+
+    def on_login(self, user):
+        self.logging_in = False
         if isinstance(user, str):
             for widget in self.canvas.winfo_children():
                 widget.destroy()
@@ -570,11 +786,18 @@ class LoginTab(AbstractTab):
             self.password_entry.place(x= self.width/2 - 150, rely=0.5, anchor='w')
      
 class SignUpTab(AbstractTab):
+    #How long typing has to stop before the username is checked, in milliseconds
+    CHECK_DELAY = 250
+
     def __init__(self, parent, button, tab_canvas, classkeys, select=False):
         super().__init__(parent, button, tab_canvas, classkeys, select)
 
         self.valid_pass = False
         self.valid_user = False
+        self.signing_up = False
+        self.check_job = None
+        #The filter of user names is built on a worker while the form is filled in, reading every name takes seconds with millions of users
+        loader.submit(lambda: query.store.names, key="user names", background=True)
 
         self.canvas = tk.Canvas(self.frame, bg='#241E2B', bd=0, highlightthickness=0, width=self.width)
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -617,7 +840,7 @@ class SignUpTab(AbstractTab):
         self.skill_label.place(x= self.width/2 - 190, rely=0.46, anchor='e')
 
         self.skills = tk.Frame(self.canvas, bg='#241E2B', width = self.width/2, height= self.height*.3)
-        self.selected_skills = self.checkbox(self.skills, query.get_all_skills(), height = self.height*.3, width = 500)
+        self.selected_skills = self.checkbox(self.skills, list(query.cache.get_all_skills()), height = self.height*.3, width = 500)
         self.skills.place(x= self.width/2 - 190, rely= 0.45)
 
         signup_button = ttk.Button(self.canvas, text="Sign Up", style="Custom.TButton")
@@ -625,9 +848,19 @@ class SignUpTab(AbstractTab):
         signup_button.bind("<Button-1>", lambda event: self.signup() if self.valid_pass and self.valid_user else None)    
 
     def signup(self):
+        #The password is hashed off the Tk thread, the tab closes once the user is stored
+        if self.signing_up:
+            return
+        self.signing_up = True
         skills = self.get_selected(self.selected_skills)
-        hashed = bcrypt.hashpw(self.password.get().encode(), bcrypt.gensalt())
-        query.create_user(self.user.get(), hashed, skills)
+        auth.service.signup(self.user.get(), self.password.get(), skills, self.on_signup)
+
+    def on_signup(self, created):
+        self.signing_up = False
+        if not created:
+            self.user_check.config(fg='red', text= "Couldn't sign up, please try again.")
+            self.user_check.place(relx = .5, rely=0.10, anchor='c')
+            return
         self.__del__()
 
     def update_tab(self):
@@ -652,11 +885,41 @@ class SignUpTab(AbstractTab):
                 self.valid_pass = True
                 self.match.place_forget()
         if var == self.user:
-            if query.verify_user(var.get()):
-                self.user_check.config(fg='red', text= "Oops! That username is taken. Try another one.")
-                self.user_check.place(relx = .5, rely=0.10, anchor='c')
-                self.valid_user = False
-            else:
-                self.user_check.config(fg='green',  text="Looks good! This username is available.")
-                self.user_check.place(relx = .5, rely=0.10, anchor='c')
-                self.valid_user = True
+            #The name can't be used until it has been checked, which happens once typing stops
+            self.valid_user = False
+            if self.check_job is not None:
+                self.frame.after_cancel(self.check_job)
+            self.check_job = self.frame.after(self.CHECK_DELAY, lambda: self.check_user(var.get()))
+
+    def check_user(self, name):
+        """
+        Most names are answered from the in memory filter of names, a possible match (or any name
+        while the filter is still being built) is looked up on a worker thread
+        """
+        self.check_job = None
+        if query.might_be_taken(name) is False:
+            self.show_user_check(False)
+            return
+        loader.submit(query.username_taken, name, key=("username taken", name)).add_done_callback(
+            lambda future: self.user_checked(name, future))
+
+    def user_checked(self, name, future):
+        if name != self.user.get():
+            #The name was changed while it was checked, the new one has its own check
+            return
+        if future.exception() is not None:
+            self.user_check.config(fg='red', text= "Couldn't check that username, please try again.")
+            self.user_check.place(relx = .5, rely=0.10, anchor='c')
+            self.valid_user = False
+            return
+        self.show_user_check(future.result())
+
+    def show_user_check(self, taken):
+        if taken:
+            self.user_check.config(fg='red', text= "Oops! That username is taken. Try another one.")
+            self.user_check.place(relx = .5, rely=0.10, anchor='c')
+            self.valid_user = False
+        else:
+            self.user_check.config(fg='green',  text="Looks good! This username is available.")
+            self.user_check.place(relx = .5, rely=0.10, anchor='c')
+            self.valid_user = True
@@ -0,0 +1,109 @@
+"""
+Hashes and checks passwords without holding up the GUI
+
+bcrypt is slow on purpose, a single hash takes a few hundred milliseconds. The GUI hands
+that work to the worker threads of prefetch.loader (bcrypt lets go of the GIL while it
+works), which calls back on the Tk thread once the answer is there. Checking a batch of
+logins from the command line spreads them over every core with a pool of processes.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+import bcrypt
+
+import query
+import prefetch
+
+
+def hash_password(password):
+    """
+    return: hashed: The salted bcrypt hash to store in users.password
+    type: String
+    """
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+def check_password(password, stored):
+    """
+    param: stored: The hash from users.password, None if the user has none
+    type: String or bytes
+
+    return: True if the password matches the hash
+    type: bool
+    """
+    if not stored:
+        return False
+    if isinstance(stored, str):
+        stored = stored.encode('utf-8')
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), stored)
+    except ValueError:
+        # Not a bcrypt hash, e.g. a password stored before they were hashed
+        return False
+
+
+def _check(pair):
+    return check_password(*pair)
+
+
+class AuthService:
+    """
+    Runs the hashing for the GUI, the callbacks are always called on the Tk thread
+
+    param: loader: Whose worker threads do the hashing
+    type: prefetch.Prefetcher
+    """
+    def __init__(self, loader=prefetch.loader):
+        self.loader = loader
+
+    def run(self, callback, function, *args):
+        """
+        Runs function(*args) on a worker thread and calls callback with what it returned on the Tk thread
+        If function raised, e.g. the database was locked, callback gets False so the GUI can try again
+        """
+        def finished(future):
+            if future.exception() is not None:
+                print(future.exception())
+                callback(False)
+            else:
+                callback(future.result())
+        future = self.loader.submit(function, *args)
+        future.add_done_callback(finished)
+        return future
+
+    def login(self, name, password, callback):
+        """
+        callback gets the user name if the password is right and False if it isn't
+        """
+        # The worker reads the hash with its own connection, then checks it
+        return self.run(lambda ok: callback(name if ok else False),
+                        lambda: check_password(password, query.password_hash(name)))
+
+    def signup(self, name, password, skills, callback):
+        """
+        callback gets what query.create_user returned once the hashed password is stored,
+        False if it failed. The worker does the hashing and the insert, so a locked database
+        never holds up the Tk thread
+        """
+        return self.run(callback, lambda: query.create_user(name, hash_password(password), skills))
+
+
+# The service the whole GUI shares
+service = AuthService()
+
+
+def verify_many(logins, processes=None):
+    """
+    Checks many logins at once using every core, for the command line and server
+
+    param: logins: (user name, password) pairs
+    type: list
+
+    return: results: For each login the user name if the password is right, otherwise False
+    type: list
+    """
+    hashes = query.password_hashes([name for name, password in logins])
+    pairs = [(password, hashes.get(name)) for name, password in logins]
+    processes = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        results = pool.map(_check, pairs, chunksize=max(1, len(pairs) // (processes * 4)))
+        return [name if ok else False for (name, password), ok in zip(logins, results)]
@@ -0,0 +1,404 @@
+"""
+Times the query layer and the drawing code on generated datasets
+
+    python benchmarks/bench.py                      # every size, compared with baseline.json
+    python benchmarks/bench.py --sizes 1k 100k      # only some sizes
+    python benchmarks/bench.py --save-baseline      # the results become the new baseline
+    python benchmarks/bench.py --ref 04d5078        # the query paths of an older commit too
+
+A size is how many tasks the dataset has, with a tenth as many users and a hundredth as
+many projects. Each dataset is made once by database_loader.generate and kept in
+benchmarks/data. Every size is timed in its own process with PM_DATABASE pointing at its
+dataset. Nothing binds the prefetcher or the resize scheduler, so their work runs straight
+away. The drawing benchmarks need a display, without DISPLAY set an Xvfb server is started
+if one is installed, otherwise they are skipped.
+
+--ref times the query benchmarks again with the code of an older commit, taken out with
+git archive and run on a copy of each dataset so it can't change them. A query path that
+commit doesn't have yet, or can't run on the current schema, is left out. The reference
+results are kept next to the others so every gain since that commit can be shown.
+
+The results are written as JSON and compared with the baseline, the run fails if a
+benchmark got slower than the tolerance allows. Timings only compare on the same machine,
+so save a new baseline with --save-baseline before timing a change somewhere else.
+"""
+import argparse
+import datetime
+import gc
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from contextlib import contextmanager
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+SIZES = {"1k": 1000, "100k": 100000, "1m": 1000000}
+DATA = os.path.join(HERE, "data")
+BASELINE = os.path.join(HERE, "baseline.json")
+RESULTS = os.path.join(HERE, "results.json")
+# The users sampled by the benchmarks are given this password, hashed once when the dataset is made
+PASSWORD = "benchmark"
+# How many of them get it, every verify_user call checks a bcrypt hash so only a few are timed
+PASSWORD_USERS = 10
+# How many different ids each benchmark picks from
+SAMPLES = 200
+
+
+def measure(function, args, repeat=5):
+    """
+    Calls function with every tuple in args, repeat rounds over. Like timeit the garbage
+    collector is off while it runs and the best round is what is compared with the baseline,
+    the other rounds are slowed down by whatever else the machine was doing
+
+    return: result: The times of the calls in microseconds, best is the mean call of the best round
+    type: dict
+    """
+    times = []
+    rounds = []
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start_round = len(times)
+            for arg in args:
+                start = time.perf_counter()
+                function(*arg)
+                times.append((time.perf_counter() - start) * 1e6)
+            rounds.append(statistics.fmean(times[start_round:]))
+    finally:
+        if collecting:
+            gc.enable()
+    times.sort()
+    return {"calls": len(times), "unit": "us", "best": min(rounds), "min": times[0],
+            "median": statistics.median(times), "mean": statistics.fmean(times),
+            "p95": times[min(len(times) - 1, int(0.95 * len(times)))], "max": times[-1]}
+
+
+def dataset(name, seed):
+    """
+    return: path: The database of that size, generated the first time it is asked for
+    type: String
+    """
+    import auth
+    import connections
+    import database_loader
+
+    os.makedirs(DATA, exist_ok=True)
+    path = os.path.join(DATA, f"{name}-seed{seed}.db")
+    if os.path.exists(path):
+        return path
+    tasks = SIZES[name]
+    print(f"Generating {name} dataset...", flush=True)
+    start = time.perf_counter()
+    building = path + ".part"
+    if os.path.exists(building):
+        os.remove(building)
+    conn = connections.connect(building)
+    database_loader.generate(conn, max(1, tasks // 10), max(1, tasks // 100), tasks, seed)
+    conn.execute("UPDATE users SET password = ? WHERE id <= ?", (auth.hash_password(PASSWORD), PASSWORD_USERS))
+    conn.commit()
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.close()
+    os.replace(building, path)
+    print(f"Generated {name} in {time.perf_counter() - start:.1f}s", flush=True)
+    return path
+
+
+def sample(conn, table, rng, count=SAMPLES):
+    last = conn.execute(f"SELECT MAX(id) FROM {table}").fetchone()[0] or 0
+    return [rng.randint(1, last) for _ in range(count)] if last else []
+
+
+def returned_data(value):
+    """
+    False for what a path that wasn't written yet gives back, like [""] or nothing
+    """
+    if isinstance(value, (list, tuple)):
+        return any(returned_data(item) for item in value)
+    return bool(value)
+
+
+def query_benchmarks(results, rng, reference=False):
+    """
+    With reference the code is an older commit's, a benchmark it can't run is left out
+    """
+    import query
+
+    def bench(name, function, args, repeat=5):
+        try:
+            result = measure(function, args, repeat)
+            if reference and not returned_data(function(*args[0])):
+                print(f"Skipping {name}, it gives back nothing at this commit", file=sys.stderr)
+                return
+            results[name] = result
+        except Exception as e:
+            if not reference:
+                raise
+            print(f"Skipping {name} ({type(e).__name__}: {e})", file=sys.stderr)
+
+    store = query.store
+    conn = store.conn
+    projects = sample(conn, "projects", rng)
+    tasks = sample(conn, "tasks", rng)
+    users = [conn.execute("SELECT name FROM users WHERE id = ?", (user,)).fetchone()[0]
+             for user in sample(conn, "users", rng, SAMPLES // 10)]
+    protected = [row[0] for row in conn.execute("SELECT name FROM users WHERE id <= ?", (PASSWORD_USERS,))]
+
+    # The first find_tasks builds the skill index, the rest use it
+    bench("find_tasks.first", lambda user: store.find_tasks(user), [(users[0],)], repeat=1)
+    bench("find_tasks", lambda user: store.find_tasks(user), [(user,) for user in users], repeat=2)
+
+    bench("get_projects.page", lambda after: store.get_projects(after_id=after, limit=50),
+          [(project,) for project in projects])
+    bench("get_projects.all", lambda: store.get_projects(), [()])
+    bench("project_info", lambda project: store.project_info(project), [(project,) for project in projects])
+    bench("projects_info.page", lambda page: store.projects_info(page),
+          [(projects[i:i + 50],) for i in range(0, len(projects), 50)])
+    bench("task_info", lambda task: store.task_info(task), [(task,) for task in tasks])
+
+    # The same reads through the query cache, once to fill it and once from it
+    def cold(project):
+        store.cache.invalidate("project", project)
+        return store.cache.project_info(project)
+    bench("cache.project_info.miss", cold, [(project,) for project in projects])
+    bench("cache.project_info.hit", lambda project: store.cache.project_info(project), [(project,) for project in projects])
+
+    bench("verify_user", lambda user: store.verify_user(user), [(user,) for user in users])
+    bench("username_taken", lambda user: store.username_taken(user),
+          [(user,) for user in users] + [("Nobody " + str(i),) for i in range(len(users))])
+    bench("verify_user.password", lambda user, password: store.verify_user(user, password),
+          [(name, PASSWORD) for name in protected[:3]], repeat=1)
+
+    # Skill matching as the user types, one call per key press
+    try:
+        from skill_search import SkillSearch
+        options = store.get_all_skills()
+    except Exception as e:
+        if not reference:
+            raise
+        print(f"Skipping skill_search ({type(e).__name__}: {e})", file=sys.stderr)
+        return
+    bench("skill_search.build", SkillSearch, [(options,)] * 10)
+    search = SkillSearch(options)
+    keys = []
+    for option in rng.sample(options, min(20, len(options))):
+        keys.extend((option[:length],) for length in range(1, len(option) + 1))
+    bench("skill_search.match", search.match, keys)
+
+
+def gui_benchmarks(results, rng):
+    import tkinter as tk
+    from tkinter import ttk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Skipping the drawing benchmarks, there is no display ({e})", file=sys.stderr)
+        return
+    import query
+    import ui_fonts
+    from text_layout import TextLayout
+    from Tabs import ExploreTab
+
+    ui_fonts.load()
+    font = ui_fonts.get("body")
+    descriptions = [row[0] for row in query.store.conn.execute("SELECT description FROM projects LIMIT 500")]
+    # A fresh layout measures every word, the same one again only looks them up
+    layout = TextLayout()
+    results["wrap_text.cold"] = measure(lambda text: layout.wrap(text, font, 700, 2), [(text,) for text in descriptions], repeat=1)
+    results["wrap_text.warm"] = measure(lambda text: layout.wrap(text, font, 700, 2), [(text,) for text in descriptions])
+
+    notebook = ttk.Notebook(root)
+    notebook.pack(fill=tk.BOTH, expand=True)
+    tab_canvas = tk.Canvas(root)
+    tab = ExploreTab(notebook, tk.Button(tab_canvas, text="Explore"), tab_canvas, {})
+    root.update()
+    results["display_all_proj"] = measure(tab.display_all_proj, [()] * 4)
+    results["display_all_proj.items"] = {"calls": 1, "unit": "items",
+                                         "median": len(tab.main_canvas.find_all())}
+    root.destroy()
+
+
+def worker(size, output, seed, code=None):
+    rng = random.Random(seed)
+    results = {}
+    if code:
+        # Only the older commit's modules are imported, a module it doesn't have yet isn't taken from this one
+        sys.path.remove(ROOT)
+        sys.path.insert(0, code)
+        query_benchmarks(results, rng, reference=True)
+    else:
+        query_benchmarks(results, rng)
+        gui_benchmarks(results, rng)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(results, file)
+
+
+@contextmanager
+def display():
+    """
+    with display() as env: env is os.environ with DISPLAY set to an Xvfb server started for
+    the benchmarks when there is no display yet and Xvfb is installed
+    """
+    if os.environ.get("DISPLAY") or shutil.which("Xvfb") is None:
+        yield dict(os.environ)
+        return
+    # Xvfb picks a free display number and writes it to the pipe once it is ready
+    read, write = os.pipe()
+    server = subprocess.Popen(["Xvfb", "-displayfd", str(write), "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                              pass_fds=(write,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.close(write)
+    try:
+        with os.fdopen(read) as pipe:
+            number = pipe.readline().strip()
+        if not number:
+            print("Xvfb didn't start, the drawing benchmarks are skipped", file=sys.stderr)
+            yield dict(os.environ)
+        else:
+            yield dict(os.environ, DISPLAY=":" + number)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def checkout(rev, directory):
+    """
+    Writes the files of commit rev into directory
+
+    return: commit: The commit rev names
+    type: String
+    """
+    commit = subprocess.run(["git", "rev-parse", "--short", rev], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout.strip()
+    archive = subprocess.run(["git", "archive", "--format=tar", commit], cwd=ROOT, check=True,
+                             capture_output=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory, filter="data")
+    return commit
+
+
+def time_size(name, path, seed, env, code=None):
+    output = os.path.join(DATA, f"{name}-results.json")
+    # A fixed hash seed so sets and dicts are laid out the same way every run
+    env = dict(env, PM_DATABASE=path, PYTHONHASHSEED=str(seed))
+    command = [sys.executable, os.path.abspath(__file__), "--worker", name, output, "--seed", str(seed)]
+    if code:
+        command += ["--code", code]
+    # Older commits open project.db in the working directory, and stdin is closed for any that ask for input
+    subprocess.run(command, env=env, cwd=os.path.dirname(path), stdin=subprocess.DEVNULL, check=True)
+    with open(output, encoding="utf-8") as file:
+        results = json.load(file)
+    os.remove(output)
+    return results
+
+
+def run(sizes, seed, refs=()):
+    report = {"meta": {"date": datetime.datetime.now().isoformat(timespec="seconds"),
+                       "python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                       "platform": platform.platform(), "seed": seed},
+              "results": {}}
+    paths = {name: dataset(name, seed) for name in sizes}
+    with display() as env:
+        for name in sizes:
+            print(f"Timing {name}...", flush=True)
+            report["results"][name] = time_size(name, paths[name], seed, env)
+    for rev in refs:
+        with tempfile.TemporaryDirectory(dir=DATA) as directory:
+            code = os.path.join(directory, "code")
+            commit = checkout(rev, code)
+            reference = report.setdefault("references", {})[commit] = {"rev": rev, "results": {}}
+            for name in sizes:
+                print(f"Timing {name} at {commit}...", flush=True)
+                copy = os.path.join(directory, "project.db")
+                shutil.copyfile(paths[name], copy)
+                try:
+                    reference["results"][name] = time_size(name, copy, seed, os.environ, code)
+                except subprocess.CalledProcessError as e:
+                    print(f"{rev} can't be timed on {name} ({e})", file=sys.stderr)
+                for leftover in (copy, copy + "-wal", copy + "-shm"):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+    return report
+
+
+def compare(report, baseline, tolerance, floor):
+    """
+    Prints every benchmark next to the baseline, the best rounds are what is compared
+    Then for each older commit, from this run's --ref or else from the baseline's, how many
+    times faster it is now, under 1 means it got slower
+
+    return: regressions: The benchmarks that got slower than tolerance allows
+    type: list
+    """
+    regressions = []
+    references = report.get("references") or baseline.get("references", {})
+    print(f"{'size':>5} {'benchmark':<28} {'best':>14} {'median':>14}")
+    for size, results in report["results"].items():
+        before = baseline.get("results", {}).get(size, {})
+        for name, result in results.items():
+            line = f"{size:>5} {name:<28} {result.get('best', result['median']):>14.1f} {result['median']:>14.1f} {result['unit']}"
+            if name in before and before[name]["unit"] == result["unit"] == "us" and before[name].get("best"):
+                ratio = result["best"] / before[name]["best"]
+                line += f"   {ratio:6.2f}x baseline"
+                if ratio > 1 + tolerance and result["best"] - before[name]["best"] > floor:
+                    line += "   SLOWER"
+                    regressions.append((size, name, ratio))
+            for commit, reference in references.items():
+                old = reference["results"].get(size, {}).get(name)
+                if old and old["unit"] == result["unit"] == "us" and result.get("best"):
+                    line += f"   {old['best'] / result['best']:7.2f}x vs {commit}"
+            print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the queries and the drawing on generated datasets")
+    parser.add_argument("--sizes", nargs="+", choices=SIZES, default=list(SIZES), help="the dataset sizes to time")
+    parser.add_argument("--seed", type=int, default=0, help="the seed the datasets and samples are made with")
+    parser.add_argument("--output", default=RESULTS, help="where the JSON results are written")
+    parser.add_argument("--baseline", default=BASELINE, help="the JSON results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="how much slower than the baseline a benchmark may be, 0.5 is 50%%")
+    parser.add_argument("--floor", type=float, default=5.0,
+                        help="differences of fewer microseconds than this are never counted as slower")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to the baseline")
+    parser.add_argument("--ref", nargs="+", default=[], metavar="REV",
+                        help="older commits whose query paths are timed too, e.g. the one before a change")
+    parser.add_argument("--worker", nargs=2, metavar=("SIZE", "OUTPUT"), help=argparse.SUPPRESS)
+    parser.add_argument("--code", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(*args.worker, args.seed, args.code)
+        return
+
+    report = run(args.sizes, args.seed, args.ref)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+    regressions = compare(report, baseline, args.tolerance, args.floor)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Saved the baseline to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} benchmarks are more than {args.tolerance:.0%} slower than the baseline")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
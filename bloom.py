@@ -0,0 +1,43 @@
+"""
+A Bloom filter, a small set that can only say "maybe in it" or "definitely not in it"
+
+It answers whether a user name is taken while someone types on the SignUp tab. A name
+that isn't in the filter is free without asking the database, a "maybe" is checked
+with one lookup. A million names take a bit over a megabyte.
+"""
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    param: capacity: How many items it is sized for, past that false positives get more common
+    type: int
+
+    param: error_rate: The share of "maybe" answers that are wrong while under capacity
+    type: float
+    """
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(capacity, 1)
+        self.size = max(int(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Two hashes from one digest give as many positions as needed (Kirsch-Mitzenmacher)
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def full(self):
+        return self.count > self.capacity
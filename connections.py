@@ -0,0 +1,116 @@
+"""
+Hands out the database connections for the whole application
+
+Every thread gets its own connection so the GUI and background workers can read at the
+same time, and WAL journaling lets those reads go on while something is written. The
+connections are tuned once when they are made and handed back to a small pool when a
+thread is done with them instead of being closed. The Tk thread keeps its connection for
+as long as the app runs, the prefetch workers (which do the password hashing too) take
+one for each piece of work with connection() so a thread waiting for work holds none.
+"""
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import database_loader
+
+# Run on every new connection
+PRAGMAS = (
+    # Readers don't wait for writers and a commit is one append to the log
+    "PRAGMA journal_mode = WAL",
+    # Safe with WAL, a crash can only lose the last commits, never corrupt the file
+    "PRAGMA synchronous = NORMAL",
+    # About 64MB of pages kept in memory per connection (negative means KiB)
+    "PRAGMA cache_size = -65536",
+    # Read the first 256MB of the file through memory mapping instead of read() calls
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+# How many compiled statements each connection keeps, sqlite3 reuses them when the same SQL runs again
+CACHED_STATEMENTS = 256
+
+
+def connect(path):
+    """
+    Opens a connection with the pragmas above, it may be handed between threads
+    """
+    conn = sqlite3.connect(path, check_same_thread=False, cached_statements=CACHED_STATEMENTS)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionManager:
+    """
+    param: path: This is the location of the sqlite database file
+    type: String
+
+    param: pool_size: How many unused connections are kept open for the next thread
+    type: int
+    """
+    def __init__(self, path, pool_size=4):
+        self.path = path
+        self.pool_size = pool_size
+        self.pool = []
+        self.open = []              # every connection this manager made that isn't closed
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.ready = False
+
+    def get(self):
+        """
+        return: conn: The connection of the calling thread, the first call takes one from the pool
+        type: sqlite3.Connection
+        """
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            with self.lock:
+                if self.pool:
+                    conn = self.pool.pop()
+                else:
+                    conn = connect(self.path)
+                    self.open.append(conn)
+                if not self.ready:
+                    # Only the first connection has to bring the schema up to date
+                    database_loader.setup(conn)
+                    self.ready = True
+            self.local.conn = conn
+        return conn
+
+    def release(self):
+        """
+        Called by a thread that is done with the database, its connection goes back to the pool
+        """
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            return
+        self.local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        with self.lock:
+            if len(self.pool) < self.pool_size:
+                self.pool.append(conn)
+            else:
+                self.open.remove(conn)
+                conn.close()
+
+    @contextmanager
+    def connection(self):
+        """
+        with manager.connection() as conn: for worker threads, the connection is released afterwards
+        """
+        try:
+            yield self.get()
+        finally:
+            self.release()
+
+    def close_all(self):
+        with self.lock:
+            for conn in self.open:
+                conn.close()
+            self.open.clear()
+            self.pool.clear()
+            self.ready = False
+        self.local = threading.local()
@@ -1,84 +1,762 @@
 """
 This is a file to load the database with User data for testing of the Project
+
+Running this file creates the tables, brings an older database up to date and
+prints everything that is stored. The functions can also be imported so the
+rest of the application sets the database up the same way.
+
+It also bulk loads users, projects, tasks and skills from .csv/.jsonl files and
+can make a synthetic dataset of any size for benchmarks, run it with --help.
 """
 
+import csv
+import datetime
+import json
+import random
 import sqlite3
 
-conn = sqlite3.connect("project.db")
-cur = conn.cursor()
-
-# Create Table USERS
-cur.execute('''
-    CREATE TABLE IF NOT EXISTS users(
-    id INTEGER PRIMARY KEY,
-    name TEXT,
-    password TEXT,
-    skills TEXT
-    )
-    ''')
+# Bumped every time a migration below is added, stored in PRAGMA user_version
+SCHEMA_VERSION = 9
+
+# The skills every user can pick from, the GUI and the synthetic data both use them
+developer_skills = [
+        "Python", "JavaScript", "Java", "C++", "C#", "HTML", "CSS", "SQL", "Ruby", "PHP", "Swift", "Kotlin",
+        "TypeScript",
+        "Go", "Rust", "Scala", "Perl", "R", "Shell Scripting", "Node.js", "React", "Angular", "Vue.js", "Django",
+        "Flask", "Spring Boot", "Ruby on Rails", "Laravel", "ASP.NET", "GraphQL", "RESTful API Development",
+        "WebSockets",
+        "WebAssembly", "Bootstrap", "Tailwind CSS", "Sass/SCSS", "Docker", "Kubernetes", "AWS", "Azure",
+        "Google Cloud Platform",
+        "Serverless Architecture", "Firebase", "MongoDB", "PostgresSQL", "MySQL", "SQLite", "Redis", "Elasticsearch",
+        "Git", "GitHub", "GitLab", "Bitbucket", "CI/CD", "Jenkins", "Travis CI", "Agile Development", "Scrum",
+        "Kanban", "Test-Driven Development (TDD)", "Behavior-Driven Development (BDD)", "Unit Testing",
+        "Integration Testing",
+        "End-to-End Testing", "Jest", "Mocha", "Chai", "Selenium", "Cypress", "Performance Optimization",
+        "Web Accessibility (WCAG)",
+        "SEO Best Practices", "Responsive Web Design", "Mobile App Development", "Progressive Web Apps (PWA)",
+        "WebVR/WebXR", "Three.js", "D3.js", "Game Development", "Unreal Engine", "Unity", "CryEngine",
+        "Machine Learning",
+        "TensorFlow", "PyTorch", "Natural Language Processing (NLP)", "Computer Vision", "Blockchain", "Ethereum",
+        "Smart Contracts", "Solidity", "Raspberry Pi", "Arduino", "IoT Development", "Embedded Systems Programming",
+        "Cybersecurity", "Penetration Testing", "Data Analysis", "Big Data", "Hadoop", "Spark", "Data Visualization",
+        "VR/AR Development"
+    ]
 
-# Create Table PROJECTS
-cur.execute('''
-    CREATE TABLE IF NOT EXISTS projects (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        owner INTEGER,
-        project TEXT,
-        project_id INTEGER,
-        tasks TEXT,
-        start_date TEXT,
-        description TEXT,
-        completed_tasks INTEGER,
-        uncompleted_tasks INTEGER
-    )
-''')
-
-# Create Table TASKS
-cur.execute('''
-    CREATE TABLE IF NOT EXISTS tasks (
+
+def create_tables(cur):
+    """
+    Creates every table the application uses if they don't exist yet
+    """
+    # Create Table USERS
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS users(
         id INTEGER PRIMARY KEY,
-        user_id TEXT,
-        project_id TEXT,
-        task INTEGER,
-        description TEXT,
-        deadline INTEGER,
-        required_skills,
-        FOREIGN KEY (task) references projects (projects_id)        
-    )
-''')
-
-# Query and print data from 'users' table
-print("Users Table:")
-# Print the column names
-cur.execute("PRAGMA table_info(users)")
-column_names = [row[1] for row in cur.fetchall()]
-print("Column names:", column_names)
-cur.execute("SELECT * FROM users")
-for row in cur.fetchall():
-    print(row)
-
-print("\n")
-
-# Query and print data from 'projects' table
-print("Projects Table:")
-# Print the column names
-cur.execute("PRAGMA table_info(projects)")
-column_names = [row[1] for row in cur.fetchall()]
-print("Column names:", column_names)
-cur.execute("SELECT * FROM projects")
-for row in cur.fetchall():
-    print(row)
-
-print("\n")
-
-# Query and print data from 'tasks' table
-print("Task Table:")
-# Print the column names
-cur.execute("PRAGMA table_info(tasks)")
-column_names = [row[1] for row in cur.fetchall()]
-print("Column names:", column_names)
-cur.execute("SELECT * FROM tasks")
-for row in cur.fetchall():
-    print(row)
-
-conn.commit()
-conn.close()
+        name TEXT,
+        password TEXT,
+        skills TEXT
+        )
+        ''')
+
+    # Create Table PROJECTS
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS projects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            owner INTEGER,
+            project TEXT,
+            project_id INTEGER,
+            tasks TEXT,
+            start_date TEXT,
+            description TEXT,
+            completed_tasks INTEGER,
+            uncompleted_tasks INTEGER,
+            contributors INTEGER DEFAULT 0
+        )
+    ''')
+
+    # Create Table TASKS
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY,
+            user_id TEXT,
+            project_id TEXT,
+            task INTEGER,
+            description TEXT,
+            deadline INTEGER,
+            required_skills,
+            completed INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (task) references projects (projects_id)
+        )
+    ''')
+
+    # Create Table SKILLS, every skill name is only stored once
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS skills (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE COLLATE NOCASE
+        )
+    ''')
+
+    # Which users have which skills
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS user_skills (
+            user_id INTEGER NOT NULL,
+            skill_id INTEGER NOT NULL,
+            PRIMARY KEY (user_id, skill_id),
+            FOREIGN KEY (user_id) references users (id),
+            FOREIGN KEY (skill_id) references skills (id)
+        ) WITHOUT ROWID
+    ''')
+
+    # Which skills each task requires
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS task_skills (
+            task_id INTEGER NOT NULL,
+            skill_id INTEGER NOT NULL,
+            PRIMARY KEY (task_id, skill_id),
+            FOREIGN KEY (task_id) references tasks (id),
+            FOREIGN KEY (skill_id) references skills (id)
+        ) WITHOUT ROWID
+    ''')
+
+    # Full text index of project names and descriptions for the search box, it reads its text from projects
+    cur.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(
+            project,
+            description,
+            content='projects',
+            content_rowid='id',
+            prefix='2 3'
+        )
+    ''')
+
+
+def create_indexes(cur):
+    """
+    Creates every index the application uses, this runs after the migrations
+    so the columns the indexes need are there
+    """
+    # The primary keys cover lookups by user/task, these cover lookups by skill
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_user_skills_skill ON user_skills (skill_id, user_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_task_skills_skill ON task_skills (skill_id, task_id)")
+    # Two users can't have the same name, this also makes logging in and checking a name an index seek
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_name ON users (name)")
+    # Covers counting a projects tasks, completed tasks and contributors without touching the table
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_project ON tasks (project_id, completed, user_id)")
+    # The counter triggers look up whether a user has any other task in the project
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_project_user ON tasks (project_id, user_id)")
+    # Pages of a projects tasks and of a users projects are read in order of id
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_project_id ON tasks (project_id, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_projects_owner ON projects (owner, id)")
+
+
+# SQLite limits how many ? one statement can have, IN lists are sent this many values at a time
+IN_CHUNK = 500
+
+
+def select_in(cur, sql, values, chunk=IN_CHUNK):
+    """
+    Runs a query with an IN list of any length, a chunk of values at a time
+
+    param: sql: The query, its IN list is written as IN ({})
+    type: String
+
+    return: rows: Every row of every chunk
+    type: list
+    """
+    values = list(values)
+    rows = []
+    for start in range(0, len(values), chunk):
+        part = values[start:start + chunk]
+        cur.execute(sql.replace("{}", ",".join("?" * len(part))), part)
+        rows.extend(cur.fetchall())
+    return rows
+
+
+def split_skills(skills):
+    """
+    Turns the old comma separated skill text into a list of skill names
+
+    param: skills: Either the comma separated text or a list of names
+    type: String or list
+
+    return: names: Every non empty skill name with the whitespace stripped
+    type: list
+    """
+    if not skills:
+        return []
+    if isinstance(skills, str):
+        skills = skills.split(",")
+    return [skill.strip() for skill in skills if skill and skill.strip()]
+
+
+def skill_ids(cur, names):
+    """
+    Gives the ids of the skills named, adding any skill that isn't stored yet
+
+    return: ids: The skill ids in the same order as the names
+    type: list
+    """
+    names = split_skills(names)
+    if not names:
+        return []
+    cur.executemany("INSERT OR IGNORE INTO skills (name) VALUES (?)", [(name,) for name in names])
+    ids = {name.lower(): skill_id for skill_id, name in select_in(cur, "SELECT id, name FROM skills WHERE name IN ({})", names)}
+    return [ids[name.lower()] for name in names]
+
+
+def _find_column(cur, table, columns):
+    """
+    Older databases named some columns differently, this finds whichever one the table has
+    """
+    cur.execute(f"PRAGMA table_info({table})")
+    existing = [row[1] for row in cur.fetchall()]
+    for column in columns:
+        if column in existing:
+            return column
+    return None
+
+
+def migrate_skills(cur):
+    """
+    Splits the comma separated users.skills and tasks.required_skills columns
+    into the skills, user_skills and task_skills tables
+    """
+    for table, columns, junction, key in (("users", ("skills", "skill"), "user_skills", "user_id"),
+                                          ("tasks", ("required_skills",), "task_skills", "task_id")):
+        column = _find_column(cur, table, columns)
+        if column is None:
+            continue
+        cur.execute(f"SELECT id, {column} FROM {table} WHERE {column} IS NOT NULL AND {column} != ''")
+        rows = [(row_id, split_skills(text)) for row_id, text in cur.fetchall()]
+        names = list({name.lower(): name for _, skills in rows for name in skills}.values())
+        ids = dict(zip((name.lower() for name in names), skill_ids(cur, names)))
+        cur.executemany(f"INSERT OR IGNORE INTO {junction} ({key}, skill_id) VALUES (?, ?)",
+                        [(row_id, ids[name.lower()]) for row_id, skills in rows for name in skills])
+
+
+def migrate_completed(cur):
+    """
+    Tasks used to have no way to be marked as done, this adds the completed flag
+    """
+    if _find_column(cur, "tasks", ("completed",)) is None:
+        cur.execute("ALTER TABLE tasks ADD COLUMN completed INTEGER NOT NULL DEFAULT 0")
+
+
+def migrate_password(cur):
+    """
+    The first users table had no password column, logging in needs one
+    """
+    if _find_column(cur, "users", ("password",)) is None:
+        cur.execute("ALTER TABLE users ADD COLUMN password TEXT")
+
+
+def migrate_unique_names(cur):
+    """
+    User names used to be able to repeat, every repeat after the first gets its id added
+    to the end (and another number if that name is taken too) so the index on users.name
+    can be made unique
+
+    Tasks only hold the name of who they are assigned to, so a task can't say which of the
+    users it meant. The ones in projects the renamed user owns go with them, the rest stay
+    with the user who keeps the name
+    """
+    cur.execute("DROP INDEX IF EXISTS idx_users_name")
+    taken = {name for (name,) in cur.execute("SELECT name FROM users")}
+    cur.execute("SELECT id, name FROM users WHERE id NOT IN (SELECT MIN(id) FROM users GROUP BY name)"
+                " AND name IS NOT NULL")
+    for user_id, name in cur.fetchall():
+        new_name = f"{name}-{user_id}"
+        number = 2
+        while new_name in taken:
+            new_name = f"{name}-{user_id}-{number}"
+            number += 1
+        taken.add(new_name)
+        print(f"Renaming repeated user '{name}' to '{new_name}'")
+        cur.execute("UPDATE users SET name = ? WHERE id = ?", (new_name, user_id))
+        cur.execute("UPDATE tasks SET user_id = ? WHERE user_id = ?"
+                    " AND project_id IN (SELECT CAST(id AS TEXT) FROM projects WHERE owner = ?)",
+                    (new_name, name, user_id))
+
+
+# Counts a projects contributors, only reads the projects part of idx_tasks_project
+_COUNT_CONTRIBUTORS = ("(SELECT COUNT(DISTINCT NULLIF(user_id, '')) FROM tasks"
+                       " WHERE project_id = CAST(projects.id AS TEXT))")
+
+
+def refresh_counters(cur):
+    """
+    Recounts the completed, uncompleted and contributor columns of every project
+    The triggers keep them right after this, it is only needed after a migration or bulk load
+    """
+    cur.execute("UPDATE projects SET"
+                " uncompleted_tasks = (SELECT COUNT(*) FROM tasks WHERE project_id = CAST(projects.id AS TEXT) AND completed = 0),"
+                " completed_tasks = (SELECT COUNT(*) FROM tasks WHERE project_id = CAST(projects.id AS TEXT) AND completed != 0),"
+                " contributors = " + _COUNT_CONTRIBUTORS)
+
+
+def create_triggers(cur):
+    """
+    Keeps the counters in the projects table right whenever a task is added, assigned, completed or removed
+    Contributors go up or down by one, only the tasks of that project with that assignee are
+    looked at (an index seek on idx_tasks_project_user) instead of recounting the whole project
+    """
+    add = ("UPDATE projects SET"
+           " uncompleted_tasks = COALESCE(uncompleted_tasks, 0) + (NEW.completed = 0),"
+           " completed_tasks = COALESCE(completed_tasks, 0) + (NEW.completed != 0)"
+           " WHERE id = NEW.project_id;")
+    remove = ("UPDATE projects SET"
+              " uncompleted_tasks = COALESCE(uncompleted_tasks, 0) - (OLD.completed = 0),"
+              " completed_tasks = COALESCE(completed_tasks, 0) - (OLD.completed != 0)"
+              " WHERE id = OLD.project_id;")
+    # NEW is a new contributor if no other task of the project is assigned to them
+    joined = ("UPDATE projects SET contributors = COALESCE(contributors, 0) + 1"
+              " WHERE id = NEW.project_id AND COALESCE(NEW.user_id, '') != ''"
+              " AND NOT EXISTS (SELECT 1 FROM tasks WHERE project_id = NEW.project_id"
+              " AND user_id = NEW.user_id AND id != NEW.id)")
+    # OLD stopped contributing if none of the project's tasks are assigned to them any more
+    left = ("UPDATE projects SET contributors = COALESCE(contributors, 0) - 1"
+            " WHERE id = OLD.project_id AND COALESCE(OLD.user_id, '') != ''"
+            " AND NOT EXISTS (SELECT 1 FROM tasks WHERE project_id = OLD.project_id AND user_id = OLD.user_id)")
+    moved = " AND (OLD.user_id IS NOT NEW.user_id OR OLD.project_id IS NOT NEW.project_id);"
+    cur.execute("CREATE TRIGGER IF NOT EXISTS trg_tasks_insert AFTER INSERT ON tasks BEGIN " + add +
+                " " + joined + "; END")
+    cur.execute("CREATE TRIGGER IF NOT EXISTS trg_tasks_update AFTER UPDATE OF completed, project_id, user_id ON tasks"
+                " BEGIN " + remove + add + " " + left + moved + " " + joined + moved + " END")
+    cur.execute("CREATE TRIGGER IF NOT EXISTS trg_tasks_delete AFTER DELETE ON tasks BEGIN " + remove +
+                " " + left + "; END")
+
+
+def migrate_contributor_triggers(cur):
+    """
+    The first counter triggers recounted every contributor of a project on each assignment,
+    they are dropped so create_triggers makes the ones that only add or take away one
+    """
+    for trigger in ("trg_tasks_insert", "trg_tasks_update", "trg_tasks_delete"):
+        cur.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+
+def create_search_triggers(cur):
+    """
+    Keeps projects_fts in step with the names and descriptions in projects
+    """
+    cur.execute("CREATE TRIGGER IF NOT EXISTS trg_projects_fts_insert AFTER INSERT ON projects BEGIN"
+                " INSERT INTO projects_fts (rowid, project, description) VALUES (NEW.id, NEW.project, NEW.description); END")
+    cur.execute("CREATE TRIGGER IF NOT EXISTS trg_projects_fts_delete AFTER DELETE ON projects BEGIN"
+                " INSERT INTO projects_fts (projects_fts, rowid, project, description)"
+                " VALUES ('delete', OLD.id, OLD.project, OLD.description); END")
+    cur.execute("CREATE TRIGGER IF NOT EXISTS trg_projects_fts_update AFTER UPDATE OF project, description ON projects BEGIN"
+                " INSERT INTO projects_fts (projects_fts, rowid, project, description)"
+                " VALUES ('delete', OLD.id, OLD.project, OLD.description);"
+                " INSERT INTO projects_fts (rowid, project, description) VALUES (NEW.id, NEW.project, NEW.description); END")
+
+
+def rebuild_search(cur):
+    """
+    Fills projects_fts again from every project, needed when it is first made or after a bulk load
+    """
+    cur.execute("INSERT INTO projects_fts (projects_fts) VALUES ('rebuild')")
+
+
+def migrate_counters(cur):
+    """
+    Adds the contributors column next to the completed and uncompleted counts and fills them in
+    """
+    if _find_column(cur, "projects", ("contributors",)) is None:
+        cur.execute("ALTER TABLE projects ADD COLUMN contributors INTEGER DEFAULT 0")
+    refresh_counters(cur)
+
+
+def setup(conn):
+    """
+    Creates anything that is missing and runs the migrations this database hasn't had yet
+    """
+    cur = conn.cursor()
+    version = cur.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    try:
+        create_tables(cur)
+        if version < 1:
+            migrate_skills(cur)
+        if version < 2:
+            migrate_completed(cur)
+        if version < 7:
+            migrate_password(cur)
+        if version < 8:
+            migrate_unique_names(cur)
+        create_indexes(cur)
+        if version < 4:
+            migrate_counters(cur)
+        if version < 6:
+            rebuild_search(cur)
+        if version < 9:
+            migrate_contributor_triggers(cur)
+        create_triggers(cur)
+        create_search_triggers(cur)
+        cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+
+# Rows are inserted this many at a time with executemany
+BATCH_SIZE = 50000
+
+
+def read_records(path):
+    """
+    Streams the rows of a .csv file (with a header line) or a .jsonl file (one object per line) as dicts
+    """
+    with open(path, newline='', encoding='utf-8') as file:
+        if path.endswith(".jsonl"):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(file)
+
+
+def write_records(path, records):
+    """
+    Writes dicts to a .jsonl file, used to save a synthetic dataset
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        for record in records:
+            file.write(json.dumps(record) + "\n")
+
+
+def _batches(records, batch_size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _next_id(cur, table):
+    return cur.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+
+
+def _empty(value):
+    return None if value in ("", None) else value
+
+
+class _SkillCache:
+    """
+    Remembers the id of every skill seen during a load so each name is only looked up once
+    """
+    def __init__(self, cur):
+        self.cur = cur
+        self.ids = {name.lower(): skill_id for skill_id, name in cur.execute("SELECT id, name FROM skills")}
+
+    def resolve(self, names):
+        new = [name for name in dict.fromkeys(names) if name.lower() not in self.ids]
+        for name, skill_id in zip(new, skill_ids(self.cur, new)):
+            self.ids[name.lower()] = skill_id
+        return [self.ids[name.lower()] for name in names]
+
+
+def load_skills(cur, records, batch_size=BATCH_SIZE):
+    """
+    records: dicts with a name
+    """
+    count = 0
+    for batch in _batches(records, batch_size):
+        cur.executemany("INSERT OR IGNORE INTO skills (name) VALUES (?)", [(record["name"],) for record in batch])
+        count += len(batch)
+    return count
+
+
+def load_users(cur, records, batch_size=BATCH_SIZE, skills=None):
+    """
+    records: dicts with a name and optionally a password hash and skills (comma separated or a list)
+    """
+    skills = skills or _SkillCache(cur)
+    user_id = _next_id(cur, "users")
+    count = 0
+    for batch in _batches(records, batch_size):
+        users = []
+        links = []
+        for record in batch:
+            users.append((user_id, record["name"], _empty(record.get("password"))))
+            names = split_skills(record.get("skills") or "")
+            links.extend((user_id, skill_id) for skill_id in skills.resolve(names))
+            user_id += 1
+        cur.executemany("INSERT INTO users (id, name, password) VALUES (?, ?, ?)", users)
+        cur.executemany("INSERT OR IGNORE INTO user_skills (user_id, skill_id) VALUES (?, ?)", links)
+        count += len(batch)
+    return count
+
+
+def load_projects(cur, records, batch_size=BATCH_SIZE):
+    """
+    records: dicts with the owner's user name, project and optionally id, description and start_date
+    """
+    project_id = _next_id(cur, "projects")
+    count = 0
+    for batch in _batches(records, batch_size):
+        names = dict.fromkeys(record["owner"] for record in batch)
+        owners = dict(select_in(cur, "SELECT name, id FROM users WHERE name IN ({})", names))
+        projects = []
+        for record in batch:
+            row_id = int(record["id"]) if _empty(record.get("id")) is not None else project_id
+            project_id = max(project_id, row_id + 1)
+            projects.append((row_id, owners.get(record["owner"]), record["project"], row_id,
+                             _empty(record.get("description")), _empty(record.get("start_date"))))
+        cur.executemany("INSERT INTO projects (id, owner, project, project_id, description, start_date)"
+                        " VALUES (?, ?, ?, ?, ?, ?)", projects)
+        count += len(batch)
+    return count
+
+
+def load_tasks(cur, records, batch_size=BATCH_SIZE, skills=None):
+    """
+    records: dicts with a project_id and task and optionally id, description, required_skills,
+    deadline, user_id (the assigned user's name) and completed
+    """
+    skills = skills or _SkillCache(cur)
+    task_id = _next_id(cur, "tasks")
+    count = 0
+    for batch in _batches(records, batch_size):
+        tasks = []
+        links = []
+        for record in batch:
+            row_id = int(record["id"]) if _empty(record.get("id")) is not None else task_id
+            task_id = max(task_id, row_id + 1)
+            tasks.append((row_id, str(record["project_id"]), record["task"], _empty(record.get("description")),
+                          _empty(record.get("deadline")), _empty(record.get("user_id")),
+                          int(record.get("completed") or 0)))
+            names = split_skills(record.get("required_skills") or "")
+            links.extend((row_id, skill_id) for skill_id in skills.resolve(names))
+        cur.executemany("INSERT INTO tasks (id, project_id, task, description, deadline, user_id, completed)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?)", tasks)
+        cur.executemany("INSERT OR IGNORE INTO task_skills (task_id, skill_id) VALUES (?, ?)", links)
+        count += len(batch)
+    return count
+
+
+def bulk_load(conn, users=(), projects=(), tasks=(), skills=(), batch_size=BATCH_SIZE):
+    """
+    Loads a lot of rows at once. Each argument is a path to a .csv/.jsonl file or an iterable of dicts,
+    they are loaded in the order skills, users, projects, tasks so later ones can refer to earlier ones.
+
+    The indexes (except the unique one on user names) and triggers are dropped for the load and
+    everything they keep up to date is rebuilt once at the end. It is all one transaction.
+
+    return: counts: table -> rows loaded
+    type: dict
+    """
+    setup(conn)
+    cur = conn.cursor()
+    synchronous = cur.execute("PRAGMA synchronous").fetchone()[0]
+    # Nothing is written to disk until the end anyway, if the load fails the transaction is thrown away
+    cur.execute("PRAGMA synchronous = OFF")
+    # sqlite3 doesn't start a transaction for DROP and CREATE by itself, so it is started here
+    cur.execute("BEGIN")
+    try:
+        cur.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'"
+                    " AND name != 'idx_users_name'")
+        for (name,) in cur.fetchall():
+            cur.execute(f"DROP INDEX {name}")
+        cur.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_%'")
+        for (name,) in cur.fetchall():
+            cur.execute(f"DROP TRIGGER {name}")
+
+        def records(source):
+            return read_records(source) if isinstance(source, str) else source
+
+        cache = _SkillCache(cur)
+        counts = {"skills": load_skills(cur, records(skills), batch_size),
+                  "users": load_users(cur, records(users), batch_size, cache),
+                  "projects": load_projects(cur, records(projects), batch_size),
+                  "tasks": load_tasks(cur, records(tasks), batch_size, cache)}
+
+        create_indexes(cur)
+        refresh_counters(cur)
+        rebuild_search(cur)
+        create_triggers(cur)
+        create_search_triggers(cur)
+        conn.commit()
+        return counts
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cur.execute(f"PRAGMA synchronous = {synchronous}")
+
+
+# Used to make synthetic names and text
+_FIRST_NAMES = ["Ana", "Marko", "Ivan", "Jelena", "Nikola", "Sara", "Luka", "Mia", "David", "Emma", "Noah", "Olivia",
+                "Liam", "Sophia", "Lucas", "Amelia", "Mateo", "Isla", "Omar", "Yuki", "Priya", "Chen", "Fatima", "Leo"]
+_LAST_NAMES = ["Petrovic", "Jovanovic", "Smith", "Garcia", "Muller", "Rossi", "Kim", "Nguyen", "Silva", "Novak",
+               "Kowalski", "Andersen", "Tanaka", "Singh", "Brown", "Martin", "Horvat", "Ivanov", "Lopez", "Costa"]
+_WORDS = ["api", "dashboard", "mobile", "web", "data", "pipeline", "search", "payments", "auth", "cache", "migration",
+          "analytics", "chat", "game", "engine", "tracker", "portal", "sync", "reports", "scheduler", "editor",
+          "inventory", "billing", "monitoring", "platform", "client", "server", "plugin", "bot", "library"]
+_VERBS = ["Build", "Fix", "Refactor", "Test", "Document", "Design", "Deploy", "Optimize", "Review", "Migrate"]
+
+
+def _zipf_weights(count):
+    # A few skills and projects are far more popular than the rest, like real data
+    total = 0.0
+    weights = []
+    for rank in range(count):
+        total += 1.0 / (rank + 1)
+        weights.append(total)
+    return weights
+
+
+def _user_name(i):
+    # Synthetic user names come from their number so projects and tasks can refer to them
+    return f"{_FIRST_NAMES[i % len(_FIRST_NAMES)]} {_LAST_NAMES[i // len(_FIRST_NAMES) % len(_LAST_NAMES)]} {i}"
+
+
+def synthetic_users(count, seed=0, first_user=0):
+    """
+    Yields made up users with 1 to 8 skills, the popular skills are picked more often
+    Passwords are left empty, hashing a million bcrypt passwords would take days
+
+    param: first_user: The number the first user's name is made from, names are unique from there on
+    type: int
+    """
+    rng = random.Random(seed)
+    weights = _zipf_weights(len(developer_skills))
+    for i in range(first_user, first_user + count):
+        yield {"name": _user_name(i),
+               "skills": list(dict.fromkeys(rng.choices(developer_skills, cum_weights=weights, k=rng.randint(1, 8))))}
+
+
+def synthetic_projects(count, users, seed=0, first_user=0):
+    """
+    Yields made up projects, each owned by one of the users synthetic_users(users, seed, first_user) makes
+    """
+    rng = random.Random(seed + 1)
+    start = datetime.date.today() - datetime.timedelta(days=3 * 365)
+    for i in range(count):
+        words = rng.sample(_WORDS, 3)
+        yield {"owner": _user_name(first_user + rng.randrange(users)),
+               "project": f"{words[0].title()} {words[1]} {i}",
+               "description": f"A {words[0]} {words[1]} with {words[2]} support. " * rng.randint(1, 4),
+               "start_date": (start + datetime.timedelta(days=rng.randrange(3 * 365))).isoformat()}
+
+
+def synthetic_tasks(count, projects, users, seed=0, first_project=1, first_user=0):
+    """
+    Yields made up tasks spread over project ids first_project to first_project + projects - 1,
+    some projects get many more tasks than others. About a third are done and a third of the
+    open ones are assigned to one of the users synthetic_users(users, seed, first_user) makes.
+    """
+    rng = random.Random(seed + 2)
+    skill_weights = _zipf_weights(len(developer_skills))
+    project_weights = _zipf_weights(projects)
+    project_ids = range(first_project, first_project + projects)
+    today = datetime.date.today()
+    for i in range(count):
+        completed = rng.random() < 0.3
+        assigned = None
+        if not completed and users and rng.random() < 0.33:
+            assigned = _user_name(first_user + rng.randrange(users))
+        deadline = None
+        if rng.random() < 0.7:
+            deadline = (today + datetime.timedelta(days=rng.randint(-30, 120))).isoformat()
+        yield {"project_id": rng.choices(project_ids, cum_weights=project_weights)[0],
+               "task": f"{rng.choice(_VERBS)} {rng.choice(_WORDS)} {i}",
+               "description": f"{rng.choice(_VERBS)} the {rng.choice(_WORDS)} for the {rng.choice(_WORDS)}.",
+               "required_skills": list(dict.fromkeys(rng.choices(developer_skills, cum_weights=skill_weights,
+                                                                 k=rng.randint(1, 4)))),
+               "deadline": deadline,
+               "user_id": assigned,
+               "completed": int(completed)}
+
+
+def generate(conn, users, projects, tasks, seed=0, batch_size=BATCH_SIZE):
+    """
+    Loads a synthetic dataset, the same seed always makes the same data
+    It can be added to a database that already has data, the new users are numbered on
+    from the last user id so their names don't clash with the ones already there
+    """
+    setup(conn)
+    cur = conn.cursor()
+    first_project = _next_id(cur, "projects")
+    first_user = _next_id(cur, "users") - 1
+    return bulk_load(conn,
+                     users=synthetic_users(users, seed, first_user),
+                     projects=synthetic_projects(projects, users, seed, first_user),
+                     tasks=synthetic_tasks(tasks, projects, users, seed, first_project, first_user),
+                     batch_size=batch_size)
+
+
+def show_tables(cur):
+    # Query and print data from 'users' table
+    print("Users Table:")
+    # Print the column names
+    cur.execute("PRAGMA table_info(users)")
+    column_names = [row[1] for row in cur.fetchall()]
+    print("Column names:", column_names)
+    cur.execute("SELECT * FROM users")
+    for row in cur:
+        print(row)
+
+    print("\n")
+
+    # Query and print data from 'projects' table
+    print("Projects Table:")
+    # Print the column names
+    cur.execute("PRAGMA table_info(projects)")
+    column_names = [row[1] for row in cur.fetchall()]
+    print("Column names:", column_names)
+    cur.execute("SELECT * FROM projects")
+    for row in cur:
+        print(row)
+
+    print("\n")
+
+    # Query and print data from 'tasks' table
+    print("Task Table:")
+    # Print the column names
+    cur.execute("PRAGMA table_info(tasks)")
+    column_names = [row[1] for row in cur.fetchall()]
+    print("Column names:", column_names)
+    cur.execute("SELECT * FROM tasks")
+    for row in cur:
+        print(row)
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+    from connections import connect
+
+    parser = argparse.ArgumentParser(description="Sets the database up, bulk loads data into it and prints it")
+    parser.add_argument("--db", default="project.db", help="the database file")
+    parser.add_argument("--skills", default=(), help="a .csv or .jsonl file of skills to load")
+    parser.add_argument("--users", default=(), help="a .csv or .jsonl file of users to load")
+    parser.add_argument("--projects", default=(), help="a .csv or .jsonl file of projects to load")
+    parser.add_argument("--tasks", default=(), help="a .csv or .jsonl file of tasks to load")
+    parser.add_argument("--generate", nargs=3, type=int, metavar=("USERS", "PROJECTS", "TASKS"),
+                        help="load a synthetic dataset of this size")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the synthetic dataset")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--show", action="store_true", help="print every table, the default when nothing is loaded")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    setup(conn)
+    loading = args.generate or args.skills or args.users or args.projects or args.tasks
+    if args.generate:
+        start = time.perf_counter()
+        counts = generate(conn, *args.generate, seed=args.seed, batch_size=args.batch_size)
+        print("Generated", counts, f"in {time.perf_counter() - start:.1f}s")
+    if args.skills or args.users or args.projects or args.tasks:
+        start = time.perf_counter()
+        counts = bulk_load(conn, users=args.users, projects=args.projects, tasks=args.tasks, skills=args.skills,
+                           batch_size=args.batch_size)
+        print("Loaded", counts, f"in {time.perf_counter() - start:.1f}s")
+    if args.show or not loading:
+        show_tables(conn.cursor())
+    conn.commit()
+    conn.close()
@@ -1,4 +1,9 @@
 from Tabs import *
+import ui_fonts
+import prefetch
+import resize
+import profiling
+import query
 
 class ProjectManager:
     def __init__(self):
@@ -8,7 +13,11 @@ class ProjectManager:
         self.root.title("Project Manager")
         self.root.iconbitmap('GUI_Design/Project_Manager.ico')
         self.root.configure(bg="#2C2634")
-        self.root.bind("<Configure>", lambda event: self.update())
+        ui_fonts.load()
+        prefetch.loader.bind(self.root, query.store.connections)
+        resize.scheduler.bind(self.root)
+        #Every widget's <Configure> reaches the root binding, only the window's own is used
+        self.root.bind("<Configure>", lambda event: resize.scheduler.request(self, self.update) if event.widget is self.root else None)
 
         style = ttk.Style()
         style.theme_use('default')
@@ -30,6 +39,9 @@ class ProjectManager:
         self.notebook.pack(fill=tk.BOTH, expand=True)
 
         self.root.mainloop()
+        #Let the workers finish what they are doing before their connections are closed
+        prefetch.loader.shutdown(wait=True)
+        query.store.close()
 
     def update(self):
         if self.width != self.root.winfo_width():
@@ -75,7 +87,8 @@ class ProjectManager:
             width = 10 
         )
         button.pack(anchor='w', pady=(10,5), padx=10, side='left')
-        self.update_scrolling()
+        #Checked once the new button has been laid out
+        resize.scheduler.request(self.tab_canvas, self.update_scrolling)
         return button
 
     def on_mousewheel(self, event, canvas, direction = 'y'):
@@ -99,9 +112,7 @@ class ProjectManager:
             self.bind_mousewheel(child, event, canvas)
 
     def update_scrolling(self):
-        # Force update of pending geometry management tasks
-        self.tab_canvas.update_idletasks()
-        
+        # This runs from the resize scheduler once Tk is idle, so the buttons already have their sizes
         # Calculate the total width of the buttons
         total_width = sum(btn.winfo_width() for btn in self.tab_frame.winfo_children())
         
@@ -118,4 +129,6 @@ class ProjectManager:
             self.tab_canvas.config(scrollregion=self.tab_canvas.bbox('all'))
             self.bind_mousewheel(self.tab_frame, "<MouseWheel>", self.tab_canvas)
 
+#Does nothing unless PM_PROFILE is set or main.py is run with --profile
+profiling.enable_from_environment()
 app = ProjectManager()
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+Runs database reads on background threads so the Tk event loop never waits on SQLite
+
+submit() gives back a future right away. Like an asyncio future its callbacks run on
+the Tk thread: finished work is collected with root.after, so callbacks can draw. Work
+that is only a guess at what the user wants next (like the tasks of the projects in
+view) goes to its own thread so it never holds up what the user is waiting for.
+"""
+import queue
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# How often Tk collects finished work while something is running, in milliseconds
+POLL_MS = 15
+
+
+class TkFuture:
+    """
+    What submit gives back, its callbacks are called with the future on the Tk thread
+    """
+    def __init__(self, future, key=None):
+        self.future = future
+        self.key = key
+        self.callbacks = []
+        self.finished = False
+
+    def done(self):
+        return self.finished
+
+    def result(self):
+        return self.future.result()
+
+    def exception(self):
+        return self.future.exception()
+
+    def add_done_callback(self, callback):
+        if self.finished:
+            callback(self)
+        else:
+            self.callbacks.append(callback)
+
+    def _finish(self):
+        self.finished = True
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                traceback.print_exc()
+
+
+class Prefetcher:
+    """
+    param: workers: How many reads the user is waiting for can run at once
+    type: int
+
+    param: max_background: How many guesses can be waiting, more are not taken
+    type: int
+    """
+    def __init__(self, workers=2, max_background=8):
+        self.workers = workers
+        self.max_background = max_background
+        self.root = None
+        self.connections = None
+        self.pools = {}                     # background or not -> ThreadPoolExecutor
+        self.finished = queue.SimpleQueue() # futures done on a worker, waiting for Tk to collect them
+        self.pending = {}                   # key -> TkFuture still running
+        self.running = {False: 0, True: 0}  # background or not -> futures not collected yet
+        self.job = None
+
+    def bind(self, root, connections=None):
+        """
+        Called once the Tk root exists, until then submit runs everything straight away
+
+        param: connections: The worker threads take a connection from it for each piece of work and hand it back after
+        type: ConnectionManager
+        """
+        self.root = root
+        self.connections = connections
+
+    def _run(self, function, *args):
+        if self.connections is None:
+            return function(*args)
+        with self.connections.connection():
+            return function(*args)
+
+    def submit(self, function, *args, key=None, background=False):
+        """
+        Runs function(*args) on a worker thread
+
+        param: key: If work with the same key is still running its future is given back instead
+        type: hashable
+
+        param: background: True for work that is only a guess, it runs on its own thread
+        type: bool
+
+        return: future: None if it is background work and too much of it is already waiting
+        type: TkFuture
+        """
+        if key is not None and key in self.pending:
+            return self.pending[key]
+        if self.root is None:
+            # Without Tk there is nothing to hand results back to, e.g. in a benchmark or the CLI
+            future = Future()
+            try:
+                future.set_result(function(*args))
+            except Exception as e:
+                future.set_exception(e)
+            tk_future = TkFuture(future, key)
+            tk_future._finish()
+            return tk_future
+        if background and self.running[True] >= self.max_background:
+            return None
+
+        if background not in self.pools:
+            self.pools[background] = ThreadPoolExecutor(max_workers=1 if background else self.workers,
+                                                        thread_name_prefix="prefetch")
+        tk_future = TkFuture(self.pools[background].submit(self._run, function, *args), key)
+        # Called on the worker thread, so it only hands the future to the queue Tk reads
+        tk_future.future.add_done_callback(lambda future: self.finished.put((tk_future, background)))
+        if key is not None:
+            self.pending[key] = tk_future
+        self.running[background] += 1
+        self._schedule()
+        return tk_future
+
+    def _schedule(self):
+        if self.job is None:
+            self.job = self.root.after(POLL_MS, self._collect)
+
+    def _collect(self):
+        self.job = None
+        while True:
+            try:
+                tk_future, background = self.finished.get_nowait()
+            except queue.Empty:
+                break
+            self.running[background] -= 1
+            if tk_future.key is not None and self.pending.get(tk_future.key) is tk_future:
+                del self.pending[tk_future.key]
+            tk_future._finish()
+        if self.running[False] or self.running[True]:
+            self._schedule()
+
+    def shutdown(self, wait=False):
+        """
+        Drops the work that hasn't started, with wait the work that is running is finished first
+        """
+        for pool in self.pools.values():
+            pool.shutdown(wait=wait, cancel_futures=True)
+        self.pools.clear()
+
+
+# The loader the whole GUI shares, main.py binds it to the root window
+loader = Prefetcher()
@@ -0,0 +1,208 @@
+"""
+Measures where the time goes, only when it is switched on
+
+Set the PM_PROFILE environment variable (to 1 or to the file the results go to) or run
+main.py with --profile. Every query.py function is then timed and its rows counted, the
+Explore tab's drawing is timed, and canvas items and font.measure calls are counted.
+Timings go into rolling histograms that are written as JSON when the app closes, and
+queries slower than the threshold are printed as they happen.
+
+Nothing is changed until enable() is called, so it costs nothing when it is off.
+"""
+import atexit
+import functools
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+# Queries taking longer than this many milliseconds are printed
+SLOW_QUERY_MS = 50.0
+# How many of the latest timings each histogram keeps
+WINDOW = 2000
+DEFAULT_PATH = "profile.json"
+
+
+class Histogram:
+    """
+    The latest WINDOW values and a count of every value by power of 2 bucket
+    """
+    def __init__(self, window=WINDOW):
+        self.values = deque(maxlen=window)
+        self.buckets = {}       # upper bound -> how many values were under it
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.values.append(value)
+        bound = 2 ** math.ceil(math.log2(value)) if value > 0 else 0
+        self.buckets[bound] = self.buckets.get(bound, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, share):
+        values = sorted(self.values)
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(share * len(values)))]
+
+    def summary(self):
+        return {"count": self.count, "total": self.total, "mean": self.total / self.count if self.count else 0.0,
+                "p50": self.percentile(0.5), "p90": self.percentile(0.9), "p99": self.percentile(0.99),
+                "max": self.max, "buckets": {str(bound): count for bound, count in sorted(self.buckets.items())}}
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.slow_query_ms = SLOW_QUERY_MS
+        self.path = DEFAULT_PATH
+        self.histograms = {}    # name -> Histogram
+        self.counters = {}      # name -> count
+        self.slow = deque(maxlen=200)
+        self.frame_items = 0
+        # Queries also run on the prefetch threads
+        self.lock = threading.Lock()
+
+    def record(self, name, value):
+        with self.lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram()
+            self.histograms[name].add(value)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def timed(self, name, function, query=False):
+        """
+        Wraps function so every call adds its time in milliseconds to the histogram name
+        Queries also count the rows they give back and are logged when they are slow
+        """
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return_value = function(*args, **kwargs)
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000
+                self.record(name, elapsed)
+            if query:
+                if isinstance(return_value, (list, dict, set)):
+                    self.record(name + ".rows", len(return_value))
+                if elapsed >= self.slow_query_ms:
+                    call = f"{name}({', '.join(repr(arg)[:40] for arg in args)})"
+                    with self.lock:
+                        self.slow.append({"call": call, "ms": elapsed, "time": time.time()})
+                    print(f"Slow query: {call} took {elapsed:.1f}ms", file=sys.stderr)
+            return return_value
+        wrapper.profiled = True
+        return wrapper
+
+    def report(self):
+        """
+        return: report: Every histogram, counter and slow query so far
+        type: dict
+        """
+        with self.lock:
+            report = {"histograms": {name: histogram.summary() for name, histogram in sorted(self.histograms.items())},
+                      "counters": dict(sorted(self.counters.items())),
+                      "slow_queries": list(self.slow),
+                      "slow_query_ms": self.slow_query_ms}
+        import query
+        report["query_cache"] = query.cache.stats()
+        return report
+
+    def dump(self, path=None):
+        with open(path or self.path, "w", encoding="utf-8") as file:
+            json.dump(self.report(), file, indent=2)
+
+    def enable(self, path=None, slow_query_ms=None):
+        """
+        Wraps what is measured, calling it again does nothing
+        """
+        if self.enabled:
+            return
+        self.enabled = True
+        if path:
+            self.path = path
+        if slow_query_ms is not None:
+            self.slow_query_ms = slow_query_ms
+        self._wrap_queries()
+        self._wrap_drawing()
+        atexit.register(self.dump)
+
+    def _wrap_queries(self):
+        import query
+        # Set on the store itself so the module functions, the query cache and the store's own calls are all timed
+        for name, function in vars(query.ProjectStore).items():
+            if name.startswith("_") or not callable(function) or name in ("batch", "close"):
+                continue
+            wrapped = self.timed("query." + name, getattr(query.store, name), query=True)
+            setattr(query.store, name, wrapped)
+            if hasattr(query, name):
+                setattr(query, name, wrapped)
+
+    def _wrap_drawing(self):
+        import tkinter as tk
+        from tkinter import font as tkFont
+        import Tabs
+
+        for name in ("display_all_proj", "display_project", "display_task", "render"):
+            setattr(Tabs.ExploreTab, name, self.timed("paint." + name, getattr(Tabs.ExploreTab, name)))
+
+        create = tk.Canvas._create
+        profiler = self
+
+        # Every create_* method of a canvas goes through _create
+        def counted_create(canvas, *args, **kwargs):
+            if profiler.frame_items == 0:
+                canvas.after_idle(profiler._end_frame)
+            profiler.frame_items += 1
+            profiler.count("canvas.items_created")
+            return create(canvas, *args, **kwargs)
+        tk.Canvas._create = counted_create
+
+        measure = tkFont.Font.measure
+
+        def counted_measure(font, *args, **kwargs):
+            profiler.count("font.measure")
+            return measure(font, *args, **kwargs)
+        tkFont.Font.measure = counted_measure
+
+    def _end_frame(self):
+        self.record("canvas.items_per_frame", self.frame_items)
+        self.frame_items = 0
+
+
+# The profiler the whole application shares
+profiler = Profiler()
+
+
+def enable_from_environment(argv=None):
+    """
+    Switches profiling on if PM_PROFILE is set or --profile is in argv, --profile=PATH picks the file
+    """
+    argv = sys.argv if argv is None else argv
+    path = None
+    on = False
+    setting = os.environ.get("PM_PROFILE", "")
+    if setting not in ("", "0"):
+        on = True
+        if setting != "1":
+            path = setting
+    for arg in argv[1:]:
+        if arg == "--profile":
+            on = True
+        elif arg.startswith("--profile="):
+            on = True
+            path = arg.split("=", 1)[1]
+    if on:
+        slow = os.environ.get("PM_SLOW_QUERY_MS")
+        profiler.enable(path, float(slow) if slow else None)
+    return on
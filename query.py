@@ -2,451 +2,822 @@
 This will be the file that all database information will be pulled from
 
 These function below are a few of the required functions for this application to work
+
+Importing this file does not touch the database, the connection is only opened
+the first time one of the functions below actually needs it. The command line
+version of the app lives in main() at the bottom of this file.
 """
+import os
 import sqlite3
-
-conn = sqlite3.connect('project.db')
-cur = conn.cursor()
-
-
-def verify_user(name, password=None):
-    """
-    This function will take in a String that is a User
-    Should Return true if the user exists and false if it doesn't
-    """
-    cur.execute("SELECT EXISTS(SELECT 1 FROM users WHERE name = ?)", (name,))
-    result = cur.fetchone()[0]
-    return result == 1
-
-user_to_verify = input("Please enter your name: ")
-input_password = None
-user_exists = verify_user(user_to_verify)
-verify_user(user_to_verify, input_password)
-def create_user(name, user_password=None, skills=None):
-    """
-    This function will take in a String that is a User
-    Should Return false if the user exists and true if it doesn't
+import threading
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+import database_loader
+from database_loader import developer_skills, select_in
+from skill_index import SkillIndex
+from bloom import BloomFilter
+from connections import ConnectionManager
+from query_cache import QueryCache
+
+#PM_DATABASE points the app at another database file, e.g. a benchmark dataset
+DATABASE = os.environ.get('PM_DATABASE', 'project.db')
+
+#Shorter words in a search only match whole words, the prefix indexes of projects_fts start at 2 letters
+SEARCH_MIN_PREFIX = 2
+#How many of the matching projects a search ranks, the first ones by id
+SEARCH_CANDIDATES = 1000
+
+
+class ProjectInfo(NamedTuple):
     """
-    if skills is None:
-        skills = []
-    if verify_user(name):
-        return False
-    cur.execute("INSERT INTO users (name, password, skills) VALUES (?, ?, ?)", (name, user_password, ', '.join(skills)))
-    conn.commit()
-    return True
-new_user_name = user_to_verify
-new_user_password = input("Enter the user's password: ")
-#new_user_skills_str = []
-#new_user_skills = new_user_skills_str.split(",")
-success = create_user(new_user_name, new_user_password)
-if success:
-    print(f"User '{new_user_name}' created successfully.")
-else:
-    print(f"Failed to create user '{new_user_name}'.")
-
-def get_available_projects():
-    """
-    Get a list of available projects from the projects table.
-    Returns a list of project names.
+    What project_info gives back, it can still be indexed like the old list
     """
-    try:
-        cur.execute("SELECT project FROM projects")
-        projects = cur.fetchall()
-        return projects
-    except sqlite3.Error:
-        return []
-
-available_projects = get_available_projects()
-print("Available Projects:")
-for project in available_projects:
-    print(project[0])
-project_choice = input("Do you want to continue with old project or start a new one? (old/new): ")
-if project_choice.lower() == "old":
-    # if old and there are no projects add question one more time
-    proj_list = get_available_projects()
-    unique_project_names = list(set(project[0] for project in proj_list))
-    if unique_project_names:
-        print("Available projects:")
-        for index, project_name in enumerate(unique_project_names, start=1):
-            print(f"{index}. {project_name}")
-        selected_project_index = input("Select a project by its index number: ")
-        try:
-            selected_project_index = int(selected_project_index) - 1
-            if 0 <= selected_project_index < len(unique_project_names):
-                selected_project_name = unique_project_names[selected_project_index]
-                print(f"You selected project: {selected_project_name}")
-            else:
-                print("Invalid project index. Continuing with no project.")
-                selected_project_name = None
-        except ValueError:
-            print("Invalid input. Continuing with no project.")
-            selected_project_name = None
-    else:
-        print("No projects available to continue with.")
-        selected_project_name = None
-else:
-    pass
+    description: str
+    uncompleted: int
+    completed: int
+    contributors: int
+    age: Optional[int]
+
 
-def create_proj(user, project):
+class TaskInfo(NamedTuple):
     """
-    adds an empty project to the project table
-    return true on success and false on failed
+    What task_info and project_tasks give back, it can still be indexed like the old list
     """
-    try:
-        cur.execute("INSERT INTO projects (owner, project) VALUES (?, ?)", (user, project,))
-        conn.commit()
-        cur.execute("UPDATE projects SET project_id = ? WHERE owner = ?", (project, user))
-        conn.commit()
-        return True
-    except sqlite3.Error as e:
-        conn.rollback()
-        return False
+    task: str
+    description: str
+    required_skills: str
+    deadline: str
+    assigned: str
+    id: int
 
-new_project_name = []
-user_name = user_to_verify
-#project_choice = input("Do you want to continue with old project or start a new one? (old/new): ")
-if project_choice.lower() == "new":
-    new_project_name = input("Enter the name of the new project: ")
-    if create_proj(user_name, new_project_name):
-        print(f"Project '{new_project_name}' created successfully.")
-    else:
-        print(f"Failed to create project '{new_project_name}'.")
-else:
-    pass
 
-def add_skill(user, skill):
+# The columns that make up a TaskInfo, the required skills are joined back into one string
+_TASK_COLUMNS = ("CAST(COALESCE(task, '') AS TEXT), COALESCE(description, ''),"
+                 " COALESCE((SELECT group_concat(skills.name, ', ') FROM task_skills"
+                 " JOIN skills ON skills.id = task_skills.skill_id WHERE task_skills.task_id = tasks.id), ''),"
+                 " CASE WHEN typeof(deadline) = 'integer' THEN date(deadline, 'unixepoch') ELSE COALESCE(deadline, '') END,"
+                 " COALESCE(user_id, ''), id")
+
+
+class ProjectStore:
     """
-    This function should add a skill or multiple to the user specified
-    return true on success and false on failed
+    This holds the connection to the database and every query the application runs against it
+
+    param: path: This is the location of the sqlite database file
+    type: String
     """
-    if not verify_user(user):
+    def __init__(self, path=DATABASE):
+        self.path = path
+        self._connections = None
+        self._index = None
+        self._recommender = None
+        self._names = None
+        self._local = threading.local()     # how deep the calling thread is in batch()
+        # What the GUI reads goes through here, the functions below that change something invalidate it
+        self.cache = QueryCache(self)
+
+    @property
+    def connections(self):
+        """
+        Nothing is opened until the first connection is asked for
+        """
+        if self._connections is None:
+            self._connections = ConnectionManager(self.path)
+        return self._connections
+
+    @property
+    def conn(self):
+        """
+        The connection of the calling thread, so worker threads never share the GUI's connection
+        """
+        return self.connections.get()
+
+    @property
+    def index(self):
+        """
+        The skill index is built from the database the first time tasks are matched
+        and kept up to date by the functions that change tasks or skills after that
+        """
+        if self._index is None:
+            self._index = SkillIndex().build(self.conn.cursor())
+        return self._index
+
+    @property
+    def recommender(self):
+        """
+        Built the first time a recommendation is asked for, new tasks make it get rebuilt
+        NumPy is only imported here so the rest of the application doesn't need it
+        """
+        if self._recommender is None:
+            from recommend import Recommender
+            self._recommender = Recommender().build(self.conn.cursor())
+        return self._recommender
+
+    @property
+    def names(self):
+        """
+        A Bloom filter of every user name, built the first time a name is checked
+        It is made twice as big as needed so sign ups don't fill it up straight away
+        """
+        if self._names is None:
+            cur = self.conn.cursor()
+            count = cur.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+            names = BloomFilter(count * 2 + 1000)
+            for (name,) in cur.execute("SELECT name FROM users WHERE name IS NOT NULL"):
+                names.add(name)
+            self._names = names
+        return self._names
+
+    @contextmanager
+    def batch(self):
+        """
+        with store.batch(): Everything changed inside is one transaction, committed once at
+        the end instead of after every call. If anything fails nothing inside is kept.
+        Batches inside a batch are part of the outer one.
+        """
+        conn = self.conn
+        depth = getattr(self._local, "batch", 0)
+        if depth == 0:
+            self._local.invalidations = []
+        self._local.batch = depth + 1
+        try:
+            yield self
+        except BaseException:
+            if depth == 0:
+                conn.rollback()
+                # The in memory indexes may have changes that were just undone
+                self._index = None
+                self._recommender = None
+                self._names = None
+                self._local.invalidations = []
+                self.cache.clear()
+            raise
+        else:
+            if depth == 0:
+                conn.commit()
+                invalidations, self._local.invalidations = self._local.invalidations, []
+                for invalidate, args in invalidations:
+                    invalidate(*args)
+        finally:
+            self._local.batch = depth
+
+    def _invalidate(self, invalidate, *args):
+        """
+        Tells the cache what changed once it is committed. Inside a batch that is when the
+        batch ends, until then other threads still read the old rows and could cache them again
+        """
+        if getattr(self._local, "batch", 0):
+            self._local.invalidations.append((invalidate, args))
+        else:
+            invalidate(*args)
+
+    def _commit(self):
+        if not getattr(self._local, "batch", 0):
+            self.conn.commit()
+
+    def _rollback(self, error):
+        """
+        Outside a batch the failed change is undone, inside one the whole batch is
+        """
+        if getattr(self._local, "batch", 0):
+            raise error
+        self.conn.rollback()
+
+    def close(self):
+        if self._connections is not None:
+            self._connections.close_all()
+            self._connections = None
+
+    def verify_user(self, name, password=None):
+        """
+        This function will take in a String that is a User
+        Should Return true if the user exists and false if it doesn't
+
+        If a password is given it is checked against the stored hash and the
+        user name is returned on success and false on failure
+        """
+        cur = self.conn.cursor()
+        if password is None:
+            cur.execute("SELECT EXISTS(SELECT 1 FROM users WHERE name = ?)", (name,))
+            return cur.fetchone()[0] == 1
+
+        # bcrypt is only imported once a password actually has to be checked
+        from auth import check_password
+        if check_password(password, self.password_hash(name)):
+            return name
         return False
-    if isinstance(skill, list):
+
+    def username_taken(self, name):
+        """
+        Used while a user name is typed, a name the filter has never seen is free
+        without touching the database, only a possible match is looked up
+
+        return: True if a user already has this name
+        type: bool
+        """
+        if name not in self.names:
+            return False
+        return self.verify_user(name)
+
+    def might_be_taken(self, name):
+        """
+        Answers from the Bloom filter alone so it can be asked on the Tk thread, it never reads the database
+
+        return: False if no user has this name, True if one might, None if the filter isn't built yet
+        type: bool
+        """
+        names = self._names
+        if names is None:
+            return None
+        return name in names
+
+    def password_hash(self, name):
+        """
+        return: hashed: The stored password hash of the user, None if there is no such user or no password
+        type: String
+        """
+        cur = self.conn.cursor()
+        cur.execute("SELECT password FROM users WHERE name = ?", (name,))
+        result = cur.fetchone()
+        return result[0] if result else None
+
+    def password_hashes(self, names):
+        """
+        return: hashes: user name -> stored password hash for every user found
+        type: dict
+        """
+        return dict(select_in(self.conn.cursor(), "SELECT name, password FROM users WHERE name IN ({})",
+                              dict.fromkeys(names)))
+
+    def create_user(self, name, user_password=None, skills=None):
+        """
+        This function will take in a String that is a User
+        Should Return false if the user exists and true if it doesn't
+        """
+        if self.verify_user(name):
+            return False
+        cur = self.conn.cursor()
         try:
-            skills_str = ', '.join(skill)
-            cur.execute("UPDATE users SET skills =? WHERE name=?", (skills_str, user))
-            conn.commit()
+            cur.execute("INSERT INTO users (name, password) VALUES (?, ?)", (name, user_password))
+            user_id = cur.lastrowid
+            ids = database_loader.skill_ids(cur, skills)
+            cur.executemany("INSERT OR IGNORE INTO user_skills (user_id, skill_id) VALUES (?, ?)",
+                            [(user_id, skill_id) for skill_id in ids])
+            self._commit()
+            if self._index is not None:
+                self._index.add_user_skills(name, ids)
+            if self._names is not None:
+                self._names.add(name)
+                if self._names.full():
+                    self._names = None
+            self._invalidate(self.cache.user_changed, name)
             return True
         except sqlite3.Error as e:
-            conn.rollback()
-            print(f"Error adding skills for user '{user}': {e}")
+            self._rollback(e)
+            print(e)
             return False
-    else:
-        print("invalid input: 'skill' parameter should be a list")
-        return False
 
-developer_skills = [
-        "Python", "JavaScript", "Java", "C++", "C#", "HTML", "CSS", "SQL", "Ruby", "PHP", "Swift", "Kotlin",
-        "TypeScript",
-        "Go", "Rust", "Scala", "Perl", "R", "Shell Scripting", "Node.js", "React", "Angular", "Vue.js", "Django",
-        "Flask", "Spring Boot", "Ruby on Rails", "Laravel", "ASP.NET", "GraphQL", "RESTful API Development",
-        "WebSockets",
-        "WebAssembly", "Bootstrap", "Tailwind CSS", "Sass/SCSS", "Docker", "Kubernetes", "AWS", "Azure",
-        "Google Cloud Platform",
-        "Serverless Architecture", "Firebase", "MongoDB", "PostgresSQL", "MySQL", "SQLite", "Redis", "Elasticsearch",
-        "Git", "GitHub", "GitLab", "Bitbucket", "CI/CD", "Jenkins", "Travis CI", "Agile Development", "Scrum",
-        "Kanban", "Test-Driven Development (TDD)", "Behavior-Driven Development (BDD)", "Unit Testing",
-        "Integration Testing",
-        "End-to-End Testing", "Jest", "Mocha", "Chai", "Selenium", "Cypress", "Performance Optimization",
-        "Web Accessibility (WCAG)",
-        "SEO Best Practices", "Responsive Web Design", "Mobile App Development", "Progressive Web Apps (PWA)",
-        "WebVR/WebXR", "Three.js", "D3.js", "Game Development", "Unreal Engine", "Unity", "CryEngine",
-        "Machine Learning",
-        "TensorFlow", "PyTorch", "Natural Language Processing (NLP)", "Computer Vision", "Blockchain", "Ethereum",
-        "Smart Contracts", "Solidity", "Raspberry Pi", "Arduino", "IoT Development", "Embedded Systems Programming",
-        "Cybersecurity", "Penetration Testing", "Data Analysis", "Big Data", "Hadoop", "Spark", "Data Visualization",
-        "VR/AR Development"
-    ]
-
-selected_skills_indices = []
-
-user_skills = developer_skills
-if user_skills:
-    print("Choose your skills from the list below:")
-    for index, skill in enumerate(developer_skills, start=1):
-        print(f"{index}. {skill}")
+    def get_projects(self, user=None, after_id=None, limit=None):
+        """
+        Get a list of available projects from the projects table.
+        If a user is given only the projects they own are returned
+
+        The projects come in order of their id, a page starts after the id
+        of the last project of the page before it so every page is an index seek
+
+        param: after_id: Only projects with a higher id are given, None starts at the beginning
+        type: int
+
+        param: limit: The most projects to give, all of them if None
+        type: int
+
+        Returns a list of (project id, project name) pairs.
+        """
+        sql = "SELECT id, project FROM projects WHERE id > ?"
+        params = [after_id if after_id is not None else -1]
+        if user is not None:
+            sql += " AND owner = (SELECT id FROM users WHERE name = ?)"
+            params.append(user)
+        sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        cur = self.conn.cursor()
+        try:
+            cur.execute(sql, params)
+            return cur.fetchall()
+        except sqlite3.Error:
+            return []
+
+    def search_projects(self, text, user=None, limit=None, offset=0):
+        """
+        Finds the projects whose name or description has every word typed, the last part
+        of a word is enough so results show up while the user is still typing
+
+        The search uses the full text index so it doesn't read through the projects table,
+        matches in the name count for more than matches in the description. A word shorter
+        than SEARCH_MIN_PREFIX only matches whole words, or is left out while it is the last
+        of several and still being typed. When every project is searched only the first
+        SEARCH_CANDIDATES matches are ranked, so a common word isn't ranked against the whole table
+
+        param: text: What was typed into the search box
+        type: String
+
+        param: user: If given only the projects they own are searched
+        type: String
+
+        return: projects: (project id, project name) pairs with the best match first
+        type: list
+        """
+        words = text.split()
+        if len(words) > 1 and len(words[-1]) < SEARCH_MIN_PREFIX:
+            #The word being typed is left out until it is long enough to search by
+            words.pop()
+        words = ['"' + word.replace('"', '""') + ('"*' if len(word) >= SEARCH_MIN_PREFIX else '"') for word in words]
+        if not words:
+            return []
+        match = " ".join(words)
+        sql = ("SELECT projects.id, projects.project FROM projects_fts"
+               " JOIN projects ON projects.id = projects_fts.rowid WHERE projects_fts MATCH ?")
+        params = [match]
+        cur = self.conn.cursor()
+        try:
+            if user is not None:
+                sql += " AND projects.owner = (SELECT id FROM users WHERE name = ?)"
+                params.append(user)
+            else:
+                #The index gives matches in id order, a rowid bound is applied inside it
+                cur.execute("SELECT rowid FROM projects_fts WHERE projects_fts MATCH ? LIMIT 1 OFFSET ?",
+                            (match, SEARCH_CANDIDATES - 1))
+                last = cur.fetchone()
+                if last is not None:
+                    sql += " AND projects_fts.rowid <= ?"
+                    params.append(last[0])
+            sql += " ORDER BY bm25(projects_fts, 10.0, 1.0) LIMIT ? OFFSET ?"
+            params += [limit if limit is not None else -1, offset]
+            cur.execute(sql, params)
+            return cur.fetchall()
+        except sqlite3.Error as e:
+            print(e)
+            return []
+
+    def get_all_skills(self):
+        """
+        return: skills: The built in skills followed by every other skill users have added
+        type: list
+        """
+        skills = list(developer_skills)
+        known = {skill.lower() for skill in skills}
+        cur = self.conn.cursor()
+        cur.execute("SELECT name FROM skills ORDER BY name")
+        skills.extend(name for (name,) in cur.fetchall() if name.lower() not in known)
+        return skills
+
+    def create_proj(self, user, project):
+        """
+        adds an empty project to the project table
+        return true on success and false on failed
+        """
+        cur = self.conn.cursor()
+        try:
+            cur.execute("INSERT INTO projects (owner, project, start_date) SELECT id, ?, date('now') FROM users WHERE name = ?",
+                        (project, user))
+            if cur.rowcount == 0:
+                return False
+            cur.execute("UPDATE projects SET project_id = id WHERE id = ?", (cur.lastrowid,))
+            self._commit()
+            self._invalidate(self.cache.project_created, user)
+            return True
+        except sqlite3.Error as e:
+            self._rollback(e)
+            return False
 
-    selected_skills_indices = input("Enter the indices of the skills you want to add (comma-separated): ")
-    selected_skills_indices = [int(index) for index in selected_skills_indices.split(",")]
-    new_user_skills = [developer_skills[index - 1] for index in selected_skills_indices]
-    success = add_skill(new_user_name, new_user_skills)
-    if success:
-        print(f"Skills added successfully for user '{new_user_name}'.")
-    else:
-        print(f"Failed to add skills for user '{new_user_name}'.")
-else:
-    print(f"No additional skills to add for user '{new_user_name}'.")
-
-#def add_task(project_id, task, skill):
-#     """
-#     This will add a task to a project and link the skill that is required
-#     return true on success and false on failed
-#     """
-#     try:
-#         cur.execute("INSERT INTO tasks (project_id, task, required_skills) VALUES (?, ?, ?)", (project_id, task, skill))
-#         conn.commit()
-#         return True
-#     except sqlite3.Error as e:
-#         conn.rollback()
-#         print(e)
-#         return False
-#
-# project_id = new_project_name
-# new_task_name = selected_skills_indices  # input("Enter the task name: ")
-# new_skill_required = None  # input("Enter the required skill: ")
-# success = add_task(project_id, new_task_name, new_skill_required)
-# if success:
-#     print("Task added successfully.")
-# else:
-#     print("Failed to add the task.")
-
-def find_tasks(user):
-    """
-    Uses the users name to find the tasks this person can work on based on their skills
-    returns all tasks(This can be done either with an id or other method)
-    """
-    try:
-        cur.execute("SELECT * FROM tasks WHERE task IN (SELECT task FROM projects Where owner=?) AND"
-                    " required_skills IN (SELECT skills FROM users Where name = ?)", (user, user))
-        tasks = cur.fetchall()
-        return tasks
-    except sqlite3.Error as e:
-        print(e)
-        return []
-
-tasks = find_tasks(new_user_name)
-print("Tasks that", new_user_name, "can work on:")
-for task in tasks:
-    print("Task ID:", task[0], "Task:", task[3])
-
-def assign_task(user, task_id):
-    """
-    Adds this to the tasks this user has assigned to them
-    return true on success and false on failed
-    """
-    try:
-        cur.execute("UPDATE tasks set user_id = ? WHERE id = ?", (user, task_id))
-        conn.commit()
-        cur.execute("UPDATE projects SET tasks = ? WHERE id = ?", (user, task_id))
-        conn.commit()
-        return True
-    except sqlite3.Error as e:
-        conn.rollback()
-        print(e)
-        return False
+    def add_skill(self, user, skill):
+        """
+        This function should add a skill or multiple to the user specified
+        return true on success and false on failed
+        """
+        if not self.verify_user(user):
+            return False
+        if isinstance(skill, list):
+            cur = self.conn.cursor()
+            try:
+                ids = database_loader.skill_ids(cur, skill)
+                cur.executemany("INSERT OR IGNORE INTO user_skills (user_id, skill_id) "
+                                "SELECT users.id, skills.id FROM users, skills WHERE users.name = ? AND skills.id = ?",
+                                [(user, skill_id) for skill_id in ids])
+                self._commit()
+                if self._index is not None:
+                    self._index.add_user_skills(user, ids)
+                self._invalidate(self.cache.user_changed, user)
+                return True
+            except sqlite3.Error as e:
+                self._rollback(e)
+                print(f"Error adding skills for user '{user}': {e}")
+                return False
+        else:
+            print("invalid input: 'skill' parameter should be a list")
+            return False
 
-user_name = user_to_verify
-task_id = 1
-success = assign_task(user_name, task_id)
-if success:
-    print("Task assigned successfully")
-else:
-    print("Failed to assign the task.")
+    def add_task(self, project_id, task, skill):
+        """
+        This will add a task to a project and link the skill that is required
+        The skill can be a single name, comma separated names or a list of names
+        return true on success and false on failed
+        """
+        cur = self.conn.cursor()
+        try:
+            cur.execute("INSERT INTO tasks (project_id, task) VALUES (?, ?)", (project_id, task))
+            task_id = cur.lastrowid
+            ids = database_loader.skill_ids(cur, skill)
+            cur.executemany("INSERT OR IGNORE INTO task_skills (task_id, skill_id) VALUES (?, ?)",
+                            [(task_id, skill_id) for skill_id in ids])
+            self._commit()
+            if self._index is not None:
+                self._index.add_task(task_id, ids)
+            self._recommender = None
+            self._invalidate(self.cache.task_changed, task_id, project_id)
+            return True
+        except sqlite3.Error as e:
+            self._rollback(e)
+            print(e)
+            return False
 
+    def find_tasks(self, user):
+        """
+        Uses the users name to find the tasks this person can work on based on their skills
+        returns all tasks(This can be done either with an id or other method)
 
-def complete_task(project_id, task_id):
-    """
-    This will move a task from todo to done
-    return true on success and false on failed
-    """
-    try:
-        # Retrieve the task information from the projects table
-        cur.execute("SELECT tasks FROM projects WHERE project_id = ? AND id = ?", (project_id, task_id))
-        task_to_complete = cur.fetchone()
+        A task is returned when it is still open and the user has at least one of
+        its required skills, the matching is done in memory by the skill index
+        """
+        try:
+            return self._task_rows(self.index.tasks_for(user))
+        except sqlite3.Error as e:
+            print(e)
+            return []
+
+    def _task_rows(self, task_ids):
+        """
+        Fetches the full rows of the tasks given, in the order of the ids
+        """
+        rows = {row[0]: row for row in select_in(self.conn.cursor(), "SELECT * FROM tasks WHERE id IN ({})", task_ids)}
+        return [rows[task_id] for task_id in task_ids if task_id in rows]
+
+    def recommend_tasks(self, user, k=10):
+        """
+        Ranks the open tasks by how many of their required skills the user has and how soon they are due
+
+        param: user: The name of the user to recommend tasks for
+        type: String
+
+        param: k: The most tasks to return
+        type: int
+
+        return: tasks: Up to k (task id, score) pairs with the best first
+        type: list
+        """
+        cur = self.conn.cursor()
+        cur.execute("SELECT user_skills.skill_id FROM users JOIN user_skills ON user_skills.user_id = users.id"
+                    " WHERE users.name = ?", (user,))
+        return self.recommender.recommend([row[0] for row in cur.fetchall()], k)
+
+    def recommend_all(self, k=10):
+        """
+        Ranks the open tasks for every user at once, this is what the nightly digests are made from
+
+        return: tasks: user name -> up to k (task id, score) pairs with the best first
+        type: dict
+        """
+        cur = self.conn.cursor()
+        cur.execute("SELECT users.name, user_skills.skill_id FROM users"
+                    " LEFT JOIN user_skills ON user_skills.user_id = users.id")
+        users = {}
+        for name, skill_id in cur.fetchall():
+            users.setdefault(name, [])
+            if skill_id is not None:
+                users[name].append(skill_id)
+        return self.recommender.recommend_all(users, k)
+
+    def assign_task(self, user, task_id):
+        """
+        Adds this to the tasks this user has assigned to them
+        return true on success and false on failed
+        """
+        cur = self.conn.cursor()
+        try:
+            # The project comes back from the update so only its part of the cache is thrown away
+            cur.execute("UPDATE tasks set user_id = ? WHERE id = ? RETURNING project_id", (user, task_id))
+            changed = [(project_id, task_id) for (project_id,) in cur.fetchall()]
+            self._commit()
+            self._remove_open(changed)
+            return True
+        except sqlite3.Error as e:
+            self._rollback(e)
+            print(e)
+            return False
 
-        if task_to_complete:
-            # Move the task to the completed_tasks column
-            cur.execute("UPDATE projects SET completed_tasks = tasks, tasks = NULL WHERE project_id = ? AND id = ?",
+    def complete_task(self, project_id, task_id):
+        """
+        This will move a task from todo to done
+        return true on success and false on failed
+        """
+        cur = self.conn.cursor()
+        try:
+            cur.execute("UPDATE tasks SET completed = 1 WHERE project_id = ? AND id = ? AND completed = 0",
                         (project_id, task_id))
-            conn.commit()
+            if cur.rowcount == 0:
+                print("Task not found.")
+                return False
+            self._commit()
+            self._remove_open([(project_id, task_id)])
             return True
-        else:
-            print("Task not found.")
+        except sqlite3.Error as e:
+            self._rollback(e)
+            print(e)
             return False
-    except sqlite3.Error as e:
-        conn.rollback()
-        print(e)
-        return False
-
-user_input_project_id = new_project_name
-user_input_task_id = new_project_name  # project_id
-success = complete_task(user_input_project_id, user_input_task_id)
-if success:
-    print("Task marked as completed.")
-else:
-    print("Failed to mark the task as completed.")
 
-def project_info(project):
-    """
-    This function takes in a project_id and returns data in the following format
-
-    param: project: This is the Primary Key of the project in the database
-    type: int
-
-    return: project_info: format below
-    project_info:
-    [0] : Project description
-    [1] : Uncompleted Tasks
-    [2] : Completed Tasks
-    [3] : Contributors
-    [4] : Age in days
-    type: list
-    """
-    project_info = [""]
-    return project_info
+    def assign_tasks(self, assignments):
+        """
+        Assigns many tasks in one transaction, the same as calling assign_task for each
 
-def project_tasks(project, skill= None):
-    """
-    This function give the task id with the associated project
-    In the future would be nice if it could only give tasks with the required skill that is entered
+        param: assignments: (user, task id) pairs
+        type: list
 
-    param: project: This is the Primary Key of the project in the database
-    type: int
+        return true on success and false on failed, on failure none of them are assigned
+        """
+        assignments = list(assignments)
+        cur = self.conn.cursor()
+        try:
+            with self.batch():
+                # The projects are read first so only their part of the cache is thrown away
+                changed = [(project_id, task_id) for task_id, project_id in
+                           select_in(cur, "SELECT id, project_id FROM tasks WHERE id IN ({})",
+                                     dict.fromkeys(task_id for user, task_id in assignments))]
+                cur.executemany("UPDATE tasks set user_id = ? WHERE id = ?", assignments)
+        except sqlite3.Error as e:
+            # Inside an outer batch the error goes up so the whole batch is undone
+            self._rollback(e)
+            print(e)
+            return False
+        self._remove_open(changed)
+        return True
 
-    param: skill: This is the skill that is checked for if it is not None
-    type: String
+    def complete_tasks(self, tasks):
+        """
+        Completes many tasks in one transaction, tasks that are not found or already done are skipped
 
-    return: task_ids: This is a list of task ids [1,2,3,4]
-    type: list
-    """
-    task_ids = []
-    return task_ids
+        param: tasks: (project id, task id) pairs
+        type: list
 
-def task_info(task):
+        return: completed: How many tasks were completed, False on failure
+        type: int
+        """
+        tasks = [(str(project_id), task_id) for project_id, task_id in tasks]
+        cur = self.conn.cursor()
+        try:
+            with self.batch():
+                # Only the tasks still open are updated, so the index is only told about those
+                open_tasks = set(select_in(cur, "SELECT CAST(project_id AS TEXT), id FROM tasks"
+                                                " WHERE completed = 0 AND id IN ({})",
+                                           [task_id for project_id, task_id in tasks]))
+                done = [pair for pair in dict.fromkeys(tasks) if pair in open_tasks]
+                cur.executemany("UPDATE tasks SET completed = 1 WHERE project_id = ? AND id = ? AND completed = 0", done)
+        except sqlite3.Error as e:
+            # Inside an outer batch the error goes up so the whole batch is undone
+            self._rollback(e)
+            print(e)
+            return False
+        self._remove_open(done)
+        return len(done)
+
+    def _remove_open(self, tasks):
+        """
+        Takes tasks that were assigned or completed out of the in memory indexes and the cache
+
+        param: tasks: (project id, task id) pairs, the project id can be None if it isn't known
+        type: iterable
+        """
+        tasks = list(tasks)
+        for project_id, task_id in tasks:
+            if self._index is not None:
+                self._index.remove_task(task_id)
+            if self._recommender is not None:
+                self._recommender.remove_task(task_id)
+        self._invalidate(self.cache.tasks_changed, tasks)
+
+    def project_info(self, project):
+        """
+        This function takes in a project_id and returns data in the following format
+
+        param: project: This is the Primary Key of the project in the database
+        type: int
+
+        return: project_info: format below, None if there is no such project
+        project_info:
+        [0] : Project description
+        [1] : Uncompleted Tasks
+        [2] : Completed Tasks
+        [3] : Contributors
+        [4] : Age in days (None if the start date can't be read)
+        type: ProjectInfo
+        """
+        return self.projects_info([project]).get(project)
+
+    def projects_info(self, projects):
+        """
+        Same as project_info but for many projects in one query
+
+        param: projects: The Primary Keys of the projects
+        type: list
+
+        return: project_info: project id -> ProjectInfo
+        type: dict
+        """
+        # The counts are kept up to date by triggers so this only reads the project rows
+        rows = select_in(self.conn.cursor(),
+                         "SELECT id, COALESCE(description, ''),"
+                         " CAST(COALESCE(uncompleted_tasks, 0) AS INTEGER),"
+                         " CAST(COALESCE(completed_tasks, 0) AS INTEGER),"
+                         " CAST(COALESCE(contributors, 0) AS INTEGER),"
+                         " CAST(julianday('now') - julianday(start_date) AS INTEGER)"
+                         " FROM projects WHERE id IN ({})", projects)
+        return {row[0]: ProjectInfo(*row[1:]) for row in rows}
+
+    def project_tasks(self, project, skill=None, limit=None, after_id=None):
+        """
+        This function gives the tasks of the associated project
+        If a skill is given only the tasks that require that skill are given
+        The tasks come in order of their id and can be paged the same way as get_projects
+
+        param: project: This is the Primary Key of the project in the database
+        type: int
+
+        param: skill: This is the skill that is checked for if it is not None
+        type: String
+
+        param: limit: The most tasks to give, all of them if None
+        type: int
+
+        param: after_id: Only tasks with a higher id are given, None starts at the beginning
+        type: int
+
+        return: tasks: The full data of every task, in the same format as task_info
+        type: list
+        """
+        sql = "SELECT " + _TASK_COLUMNS + " FROM tasks WHERE project_id = ? AND id > ?"
+        params = [str(project), after_id if after_id is not None else -1]
+        if skill is not None:
+            sql += (" AND id IN (SELECT task_skills.task_id FROM skills"
+                    " JOIN task_skills ON task_skills.skill_id = skills.id WHERE skills.name = ?)")
+            params.append(skill)
+        sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        cur = self.conn.cursor()
+        cur.execute(sql, params)
+        return [TaskInfo(*row) for row in cur.fetchall()]
+
+    def task_info(self, task):
+        """
+        This function takes in the task id and will return a list of task data
+
+        param: task: This is the primary key of the task
+        type: int
+
+        return: task_data: This is a  list that is in the given format, None if there is no such task
+        task_data:
+        [0] : Task
+        [1] : Task Description
+        [2] : Required Skills
+        [3] : Deadline
+        [4] : Assigned User (In String form)
+        [5] : Task id
+        type: TaskInfo
+        """
+        return self.tasks_info([task]).get(task)
+
+    def tasks_info(self, tasks):
+        """
+        Same as task_info but for many tasks in one query
+
+        param: tasks: The Primary Keys of the tasks
+        type: list
+
+        return: task_data: task id -> TaskInfo
+        type: dict
+        """
+        rows = select_in(self.conn.cursor(), "SELECT " + _TASK_COLUMNS + " FROM tasks WHERE id IN ({})", tasks)
+        return {row[5]: TaskInfo(*row) for row in rows}
+
+
+# The store the rest of the application shares, nothing is opened until it is first used
+store = ProjectStore()
+
+verify_user = store.verify_user
+username_taken = store.username_taken
+might_be_taken = store.might_be_taken
+password_hash = store.password_hash
+password_hashes = store.password_hashes
+create_user = store.create_user
+get_projects = store.get_projects
+search_projects = store.search_projects
+get_all_skills = store.get_all_skills
+create_proj = store.create_proj
+add_skill = store.add_skill
+add_task = store.add_task
+find_tasks = store.find_tasks
+recommend_tasks = store.recommend_tasks
+recommend_all = store.recommend_all
+assign_task = store.assign_task
+complete_task = store.complete_task
+assign_tasks = store.assign_tasks
+complete_tasks = store.complete_tasks
+project_info = store.project_info
+projects_info = store.projects_info
+project_tasks = store.project_tasks
+task_info = store.task_info
+tasks_info = store.tasks_info
+cache = store.cache
+
+
+def main():
     """
-    This function takes in the task id and will return a list of task data
-
-    param: task: This is the primary key of the task
-    type: int
-
-    return: task_data: This is a  list that is in the given format
-    task_data:
-    [0] : Task
-    [1] : Task Description
-    [2] : Required Skills
-    [3] : Deadline
-    [4] : Assigned User (In String form)
-    type: list
+    Command line version of the application, walks through making a user, a project and working on tasks
     """
-    task_data = [""]
-    return task_data
-
-# user_to_verify = input("Please enter your name: ")
-# user_exists = verify_user(user_to_verify)
-
-# if user_exists:
-#     print(f"Welcome, {user_to_verify}!")
-#     projects = get_available_projects()
-#     if projects:
-#         print("Available projects:")
-#         for index, project in enumerate(projects, start=0):
-#             print(f"{index}. {project[0]}")
-#     else:
-#         new_user = user_to_verify
-#         if create_user(new_user):
-#             print(f"User '{new_user}' created successfully.")
-#         else:
-#             pass
-#
-# developer_skills = [
-#             "Python", "JavaScript", "Java", "C++", "C#", "HTML", "CSS", "SQL", "Ruby", "PHP", "Swift", "Kotlin",
-#             "TypeScript",
-#             "Go", "Rust", "Scala", "Perl", "R", "Shell Scripting", "Node.js", "React", "Angular", "Vue.js", "Django",
-#             "Flask", "Spring Boot", "Ruby on Rails", "Laravel", "ASP.NET", "GraphQL", "RESTful API Development",
-#             "WebSockets",
-#             "WebAssembly", "Bootstrap", "Tailwind CSS", "Sass/SCSS", "Docker", "Kubernetes", "AWS", "Azure",
-#             "Google Cloud Platform",
-#             "Serverless Architecture", "Firebase", "MongoDB", "PostgresSQL", "MySQL", "SQLite", "Redis", "Elasticsearch",
-#             "Git", "GitHub", "GitLab", "Bitbucket", "CI/CD", "Jenkins", "Travis CI", "Agile Development", "Scrum",
-#             "Kanban", "Test-Driven Development (TDD)", "Behavior-Driven Development (BDD)", "Unit Testing",
-#             "Integration Testing",
-#             "End-to-End Testing", "Jest", "Mocha", "Chai", "Selenium", "Cypress", "Performance Optimization",
-#             "Web Accessibility (WCAG)",
-#             "SEO Best Practices", "Responsive Web Design", "Mobile App Development", "Progressive Web Apps (PWA)",
-#             "WebVR/WebXR", "Three.js", "D3.js", "Game Development", "Unreal Engine", "Unity", "CryEngine",
-#             "Machine Learning",
-#             "TensorFlow", "PyTorch", "Natural Language Processing (NLP)", "Computer Vision", "Blockchain", "Ethereum",
-#             "Smart Contracts", "Solidity", "Raspberry Pi", "Arduino", "IoT Development", "Embedded Systems Programming",
-#             "Cybersecurity", "Penetration Testing", "Data Analysis", "Big Data", "Hadoop", "Spark", "Data Visualization",
-#             "VR/AR Development"
-# ]
-# if not user_exists:
-#     new_user = user_to_verify
-#     if create_user(new_user, password=None):
-#         print(f"Welcome '{new_user}'.")
-#     else:
-#         print(f"New user '{new_user}' already exists.")
-#
-#     if add_skill(new_user, developer_skills):
-#         selected_skills = []
-#         print("Add all your skills from our list:")
-#         for index, skill in enumerate(developer_skills, start=1):
-#             print(f"{index}. {skill}")
-#
-#         selected_skill = None  # Initialize selected_skill outside the loop
-#         while selected_skill != 'done':
-#             selected_skill = input("Select a skill by its number (or 'done' to finish selecting): ")
-#             if selected_skill.lower() == 'done':
-#                 break
-#
-#             try:
-#                 skill_index = int(selected_skill) - 1
-#                 if 0 <= skill_index < len(developer_skills):
-#                     selected_skills.append(developer_skills[skill_index])
-#                     print(f"Selected skill: {developer_skills[skill_index]}")
-#                 else:
-#                     print("Invalid skill number. Please try again.")
-#             except ValueError:
-#                 print("Invalid input. Please enter a valid skill number or 'done'.")
-#
-#         if selected_skills:
-#             if add_skill(new_user, selected_skills):
-#                 pass
-#             else:
-#                 print(f"Failed to add skills for user '{new_user}'.")
-#     else:
-#         print(f"Failed to add skills for user '{new_user}'.")
-#
-# project_choice = input("Do you want to continue with old project or start a new one? (old/new): ")
-# if project_choice.lower() == "old":
-#     proj_list = get_available_projects()
-#     unique_project_names = list(set(project[0] for project in proj_list))
-#     if unique_project_names:
-#         print("Available projects:")
-#         for index, project_name in enumerate(unique_project_names, start=1):
-#             print(f"{index}. {project_name}")
-#         selected_project_index = input("Select a project by its index number: ")
-#         try:
-#             selected_project_index = int(selected_project_index) - 1
-#             if 0 <= selected_project_index < len(unique_project_names):
-#                 selected_project_name = unique_project_names[selected_project_index]
-#                 print(f"You selected project: {selected_project_name}")
-#             else:
-#                 print("Invalid project index. Continuing with no project.")
-#                 selected_project_name = None
-#         except ValueError:
-#             print("Invalid input. Continuing with no project.")
-#             selected_project_name = None
-#     else:
-#         print("No projects available to continue with.")
-#         selected_project_name = None
-#
-# elif project_choice.lower() == "new":
-#     new_project_name = input("Enter the name of the new project: ")
-#     if create_proj(user_to_verify, new_project_name):
-#         print(f"Project '{new_project_name}' created successfully.")
-#     else:
-#         print(f"Failed to create project '{new_project_name}'.")
-# else:
-#     print("No projects available at the moment. You can start a new Project.")
-#     create_new_project = input("Would you like to create a new project? (yes/no): ")
-#     if create_new_project.lower() == "yes":
-#         new_project_name = input("Enter the name of the new project: ")
-#         if create_proj(user_to_verify, new_project_name):
-#             print(f"Project '{new_project_name}' created successfully.")
-#         else:
-#             print(f"Failed to create project '{new_project_name}'.")
-
-# find_task
+    user_to_verify = input("Please enter your name: ")
+    new_user_name = user_to_verify
+    new_user_password = input("Enter the user's password: ")
+    from auth import hash_password
+    success = create_user(new_user_name, hash_password(new_user_password))
+    if success:
+        print(f"User '{new_user_name}' created successfully.")
+    else:
+        print(f"Failed to create user '{new_user_name}'.")
+
+    available_projects = get_projects()
+    print("Available Projects:")
+    for project in available_projects:
+        print(project[1])
+    project_choice = input("Do you want to continue with old project or start a new one? (old/new): ")
+    new_project_name = None
+    if project_choice.lower() == "old":
+        # if old and there are no projects add question one more time
+        unique_project_names = list(set(project[1] for project in available_projects))
+        if unique_project_names:
+            print("Available projects:")
+            for index, project_name in enumerate(unique_project_names, start=1):
+                print(f"{index}. {project_name}")
+            selected_project_index = input("Select a project by its index number: ")
+            try:
+                selected_project_index = int(selected_project_index) - 1
+                if 0 <= selected_project_index < len(unique_project_names):
+                    selected_project_name = unique_project_names[selected_project_index]
+                    print(f"You selected project: {selected_project_name}")
+                else:
+                    print("Invalid project index. Continuing with no project.")
+            except ValueError:
+                print("Invalid input. Continuing with no project.")
+        else:
+            print("No projects available to continue with.")
+    elif project_choice.lower() == "new":
+        new_project_name = input("Enter the name of the new project: ")
+        if create_proj(user_to_verify, new_project_name):
+            print(f"Project '{new_project_name}' created successfully.")
+        else:
+            print(f"Failed to create project '{new_project_name}'.")
+
+    print("Choose your skills from the list below:")
+    for index, skill in enumerate(developer_skills, start=1):
+        print(f"{index}. {skill}")
+    selected_skills_indices = input("Enter the indices of the skills you want to add (comma-separated): ")
+    try:
+        selected_skills_indices = [int(index) for index in selected_skills_indices.split(",")]
+        new_user_skills = [developer_skills[index - 1] for index in selected_skills_indices]
+    except (ValueError, IndexError):
+        new_user_skills = []
+    if new_user_skills and add_skill(new_user_name, new_user_skills):
+        print(f"Skills added successfully for user '{new_user_name}'.")
+    else:
+        print(f"Failed to add skills for user '{new_user_name}'.")
+
+    tasks = find_tasks(new_user_name)
+    print("Tasks that", new_user_name, "can work on:")
+    for task in tasks:
+        print("Task ID:", task[0], "Task:", task[3])
+
+    task_id = 1
+    if assign_task(new_user_name, task_id):
+        print("Task assigned successfully")
+    else:
+        print("Failed to assign the task.")
+
+    if complete_task(new_project_name, new_project_name):
+        print("Task marked as completed.")
+    else:
+        print("Failed to mark the task as completed.")
 
 
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""
+Keeps what the GUI read from the database so drawing the same thing again doesn't query it
+
+Every answer is stored under the thing it is about (a project, a task, a user) so the
+functions in query.py that change something only throw away what they changed. Answers
+are also forgotten after a while and the least recently used ones go first once it is full.
+Background threads read through it too, so changes to what it holds are made under a lock.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+# Entries about users are all invalidated together, a new or closed task can change what anyone is matched with
+USERS = "user"
+
+
+class QueryCache:
+    """
+    param: store: The ProjectStore the answers come from
+    type: ProjectStore
+
+    param: max_entries: How many answers are kept at most
+    type: int
+
+    param: ttl: How many seconds an answer is trusted
+    type: float
+    """
+    def __init__(self, store, max_entries=10000, ttl=30.0):
+        self.store = store
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()    # key -> (time it expires, value), oldest used first
+        self.groups = {}                # (kind, id) -> keys of the answers about it
+        self.task_projects = {}         # task id -> project id, learned from project_tasks
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.lock = threading.RLock()
+        # Bumped by every invalidation, an answer loaded while it changed may be out of date and isn't kept
+        self.version = 0
+
+    def stats(self):
+        """
+        return: stats: The hit/miss counters and how full the cache is
+        type: dict
+        """
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions, "expired": self.expired,
+                "entries": len(self.entries), "max_entries": self.max_entries}
+
+    def _get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                self.expired += 1
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def _put(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            self.groups.setdefault(key[:2], set()).add(key)
+            while len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        self.entries.pop(key, None)
+        group = self.groups.get(key[:2])
+        if group is not None:
+            group.discard(key)
+            if not group:
+                del self.groups[key[:2]]
+
+    def _cached(self, key, load):
+        found, value = self._get(key)
+        if not found:
+            version = self.version
+            value = load()
+            # Checked and stored together, an invalidation between the two would be lost
+            with self.lock:
+                if version == self.version:
+                    self._put(key, value)
+        return value
+
+    def _cached_many(self, kind, ids, load):
+        """
+        Looks every id up on its own and loads only the missing ones with one call to load
+        """
+        results = {}
+        missing = []
+        for entity in dict.fromkeys(ids):
+            found, value = self._get((kind, entity))
+            if found:
+                results[entity] = value
+            else:
+                missing.append(entity)
+        if missing:
+            version = self.version
+            loaded = load(missing)
+            with self.lock:
+                if version == self.version:
+                    for entity, value in loaded.items():
+                        self._put((kind, entity), value)
+            results.update(loaded)
+        return results
+
+    # What the GUI reads, each the same as the function of the same name in query.py
+
+    def get_projects(self, user=None, after_id=None, limit=None):
+        return self._cached(("projects", user, after_id, limit),
+                            lambda: self.store.get_projects(user, after_id, limit))
+
+    def search_projects(self, text, user=None, limit=None, offset=0):
+        return self._cached(("search", None, text, user, limit, offset),
+                            lambda: self.store.search_projects(text, user, limit, offset))
+
+    def project_info(self, project):
+        return self._cached(("project", int(project)), lambda: self.store.project_info(project))
+
+    def projects_info(self, projects):
+        return self._cached_many("project", [int(project) for project in projects], self.store.projects_info)
+
+    def project_tasks(self, project, skill=None, limit=None, after_id=None):
+        def load():
+            tasks = self.store.project_tasks(project, skill, limit, after_id)
+            for task in tasks:
+                self.task_projects[task.id] = int(project)
+            return tasks
+        return self._cached(("project_tasks", int(project), skill, limit, after_id), load)
+
+    def peek_project_tasks(self, project, skill=None, limit=None, after_id=None):
+        """
+        The same as project_tasks but it never reads the database, so it can be called on the Tk thread
+
+        return: tasks: None if they aren't cached
+        type: list
+        """
+        found, value = self._get(("project_tasks", int(project), skill, limit, after_id))
+        return value if found else None
+
+    def task_info(self, task):
+        return self._cached(("task", int(task)), lambda: self.store.task_info(task))
+
+    def tasks_info(self, tasks):
+        return self._cached_many("task", [int(task) for task in tasks], self.store.tasks_info)
+
+    def find_tasks(self, user):
+        return self._cached((USERS, user, "find_tasks"), lambda: self.store.find_tasks(user))
+
+    def recommend_tasks(self, user, k=10):
+        return self._cached((USERS, user, "recommend", k), lambda: self.store.recommend_tasks(user, k))
+
+    def get_all_skills(self):
+        return self._cached(("skills", None), self.store.get_all_skills)
+
+    # Called by the functions in query.py that change the database
+
+    def invalidate(self, kind, entity=None):
+        with self.lock:
+            self.version += 1
+            for key in list(self.groups.get((kind, entity), ())):
+                self._drop(key)
+
+    def invalidate_kind(self, kind):
+        with self.lock:
+            for group in [group for group in self.groups if group[0] == kind]:
+                self.invalidate(*group)
+
+    def clear(self):
+        with self.lock:
+            self.version += 1
+            self.entries.clear()
+            self.groups.clear()
+            self.task_projects.clear()
+
+    def project_created(self, user):
+        # A new project is on the last page of every list it is in and can show up in any search
+        self.invalidate("projects", None)
+        self.invalidate("projects", user)
+        self.invalidate_kind("search")
+
+    def task_changed(self, task_id, project_id=None):
+        """
+        A task was added, assigned or completed, which changes its project's counters and task list
+        """
+        self.tasks_changed([(project_id, task_id)])
+
+    def tasks_changed(self, tasks):
+        """
+        param: tasks: (project id, task id) pairs, the project id can be None if it isn't known
+        type: iterable
+        """
+        unknown = False
+        for project_id, task_id in tasks:
+            task_id = int(task_id)
+            if project_id is None:
+                project_id = self.task_projects.get(task_id)
+            self.invalidate("task", task_id)
+            if project_id is None:
+                unknown = True
+            else:
+                self.invalidate("project", int(project_id))
+                self.invalidate("project_tasks", int(project_id))
+        if unknown:
+            # Which project it belongs to isn't known, so every project's counters are forgotten
+            self.invalidate_kind("project")
+            self.invalidate_kind("project_tasks")
+        self.invalidate_kind(USERS)
+
+    def user_changed(self, user):
+        self.invalidate(USERS, user)
+        self.invalidate("skills", None)
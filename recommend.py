@@ -0,0 +1,198 @@
+"""
+Ranks open tasks for users by how well their skills fit, using NumPy
+
+Every open task is one row of bits (one bit per skill, packed 8 to a byte). A task's
+score is the share of its required skills the user has, multiplied by how urgent its
+deadline is, so a task the user covers completely and that is due soon ranks first.
+"""
+import time
+import numpy as np
+
+from skill_index import OPEN_TASK
+
+# How much an overdue task is boosted compared to one with no deadline
+URGENCY_WEIGHT = 1.0
+# Deadlines this many days away get half of the boost
+URGENCY_DAYS = 7.0
+
+# How many users recommend_all scores at once and against how many tasks, a block of
+# scores takes USER_BLOCK * TASK_CHUNK * 4 bytes (8 MB)
+USER_BLOCK = 512
+TASK_CHUNK = 4096
+
+# Number of bits set in every possible byte, used when NumPy has no bitwise_count
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount(packed):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(packed)
+    return _POPCOUNT[packed]
+
+
+def _words(packed):
+    """
+    Pads rows of packed skill bits to whole 64 bit words so one popcount counts 64 skills,
+    without NumPy's bitwise_count the bytes are counted one at a time instead
+    """
+    if not hasattr(np, "bitwise_count"):
+        return packed
+    padding = -packed.shape[1] % 8
+    return np.ascontiguousarray(np.pad(packed, ((0, 0), (0, padding)))).view(np.uint64)
+
+
+def _julian_now():
+    return time.time() / 86400.0 + 2440587.5
+
+
+class Recommender:
+    def __init__(self):
+        self.skill_columns = {}                             # skill id -> bit column
+        self.task_ids = np.zeros(0, dtype=np.int64)         # row -> task id, sorted
+        self.tasks = np.zeros((0, 0), dtype=np.uint8)       # row -> packed skill bits
+        self.required = np.zeros(0, dtype=np.float32)       # row -> amount of required skills
+        self.deadlines = np.zeros(0, dtype=np.float64)      # row -> deadline as a julian day, nan if none
+        self.open = np.zeros(0, dtype=bool)                 # row -> still open
+
+    def build(self, cur):
+        """
+        Loads the skills and deadlines of every open task from the database
+        """
+        cur.execute("SELECT task_skills.task_id, task_skills.skill_id FROM task_skills"
+                    " JOIN tasks ON tasks.id = task_skills.task_id WHERE " + OPEN_TASK)
+        pairs = np.array(cur.fetchall(), dtype=np.int64).reshape(-1, 2)
+        self.task_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+        skill_ids, columns = np.unique(pairs[:, 1], return_inverse=True)
+        self.skill_columns = {int(skill_id): column for column, skill_id in enumerate(skill_ids)}
+
+        self.tasks = np.zeros((len(self.task_ids), (len(skill_ids) + 7) // 8), dtype=np.uint8)
+        np.bitwise_or.at(self.tasks, (rows, columns >> 3), (128 >> (columns & 7)).astype(np.uint8))
+        self.required = _popcount(self.tasks).sum(axis=1, dtype=np.float32)
+        self.open = np.ones(len(self.task_ids), dtype=bool)
+
+        cur.execute("SELECT tasks.id, CASE WHEN typeof(deadline) = 'integer' THEN julianday(deadline, 'unixepoch')"
+                    " ELSE julianday(deadline) END FROM tasks WHERE " + OPEN_TASK)
+        deadlines = dict(cur.fetchall())
+        self.deadlines = np.array([deadlines.get(int(task_id)) for task_id in self.task_ids], dtype=np.float64)
+        return self
+
+    def remove_task(self, task_id):
+        """
+        Called once a task is assigned or completed so it is no longer recommended
+        """
+        row = np.searchsorted(self.task_ids, task_id)
+        if row < len(self.task_ids) and self.task_ids[row] == task_id:
+            self.open[row] = False
+
+    def pack(self, skill_ids):
+        """
+        Turns a list of skill ids into the same packed bits the task rows use
+        """
+        bits = np.zeros(self.tasks.shape[1] * 8, dtype=bool)
+        for skill_id in skill_ids:
+            if skill_id in self.skill_columns:
+                bits[self.skill_columns[skill_id]] = True
+        return np.packbits(bits)
+
+    def urgency(self, rows=slice(None)):
+        days_left = np.maximum(self.deadlines[rows] - _julian_now(), 0.0)
+        urgency = 1.0 + URGENCY_WEIGHT / (1.0 + days_left / URGENCY_DAYS)
+        return np.where(np.isnan(urgency), 1.0, urgency)
+
+    def scores(self, skill_ids):
+        """
+        return: scores: The score of every task row for a user with these skills, 0 if they share no skill
+        type: numpy.ndarray
+        """
+        overlap = _popcount(self.tasks & self.pack(skill_ids)).sum(axis=1, dtype=np.float32)
+        scores = overlap / np.maximum(self.required, 1) * self.urgency()
+        scores[~self.open] = 0
+        return scores
+
+    def recommend(self, skill_ids, k=10):
+        """
+        param: skill_ids: The skills of the user to recommend tasks for
+        type: list
+
+        param: k: The most tasks to return
+        type: int
+
+        return: tasks: Up to k (task id, score) pairs with the best first
+        type: list
+        """
+        if k <= 0:
+            return []
+        return self._top(self.scores(skill_ids), k)
+
+    def recommend_all(self, users, k=10, user_block=USER_BLOCK, chunk=TASK_CHUNK):
+        """
+        Scores every user against every task, used for the nightly digests
+
+        Users are scored a block at a time against a chunk of tasks at a time and only the
+        k best of each user are kept between chunks, so the memory it needs is the same
+        however many users and tasks there are
+
+        param: users: user name -> list of their skill ids
+        type: dict
+
+        return: tasks: user name -> up to k (task id, score) pairs with the best first
+        type: dict
+        """
+        names = list(users)
+        if k <= 0:
+            return {name: [] for name in names}
+        task_words = _words(self.tasks)
+        results = {}
+        for first in range(0, len(names), user_block):
+            block = names[first:first + user_block]
+            packed = _words(np.stack([self.pack(users[name]) for name in block]))
+            best_scores, best_rows = self._top_block(packed, task_words, k, chunk)
+            for row, name in enumerate(block):
+                order = np.argsort(-best_scores[row], kind="stable")
+                results[name] = [(int(self.task_ids[best_rows[row, i]]), float(best_scores[row, i]))
+                                 for i in order if best_scores[row, i] > 0]
+        return results
+
+    def _top_block(self, packed, task_words, k, chunk):
+        """
+        param: packed: The skill bits of a block of users, one row each, from _words
+        type: numpy.ndarray
+
+        param: task_words: _words of every task row
+        type: numpy.ndarray
+
+        return: scores, rows: The k best scores of every user and the task rows they belong to, not in order
+        type: tuple
+        """
+        users = len(packed)
+        best_scores = np.zeros((users, 0), dtype=np.float32)
+        best_rows = np.zeros((users, 0), dtype=np.int64)
+        for start in range(0, len(self.task_ids), chunk):
+            tasks = task_words[start:start + chunk]
+            # How many skills each user shares with each task, counted a word of skill bits at a time
+            overlap = np.zeros((users, len(tasks)), dtype=np.uint16)
+            for word in range(tasks.shape[1]):
+                overlap += _popcount(packed[:, word, None] & tasks[None, :, word])
+            rows = slice(start, start + len(tasks))
+            weight = (self.urgency(rows) / np.maximum(self.required[rows], 1) * self.open[rows]).astype(np.float32)
+            scores = overlap * weight
+            candidates = np.broadcast_to(np.arange(start, start + len(tasks)), scores.shape)
+            # Keep only the k best of what was kept so far and this chunk
+            scores = np.concatenate([best_scores, scores], axis=1)
+            candidates = np.concatenate([best_rows, candidates], axis=1)
+            if scores.shape[1] > k:
+                keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, keep, axis=1)
+                candidates = np.take_along_axis(candidates, keep, axis=1)
+            best_scores, best_rows = scores, candidates
+        return best_scores, best_rows
+
+    def _top(self, scores, k):
+        """
+        Picks the k best scores without sorting all of them, only the k picked are sorted
+        """
+        rows = np.flatnonzero(scores > 0)
+        if len(rows) > k:
+            rows = rows[np.argpartition(-scores[rows], k - 1)[:k]]
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+        return [(int(self.task_ids[row]), float(scores[row])) for row in rows]
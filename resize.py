@@ -0,0 +1,45 @@
+"""
+Turns a burst of <Configure> events into one relayout
+
+Dragging the edge of the window sends a <Configure> event for every pixel. Instead of
+laying everything out again for each one, whatever asked for a relayout is remembered
+and run once with after_idle, when Tk has handled every event that was waiting.
+"""
+
+
+class ResizeScheduler:
+    def __init__(self):
+        self.root = None
+        self.job = None
+        self.waiting = {}   # key -> callback, each key is laid out once however often it asked
+
+    def bind(self, root):
+        """
+        Called once the Tk root exists, until then request runs the callback straight away
+        """
+        self.root = root
+
+    def request(self, key, callback):
+        """
+        param: key: What is being laid out, asking again for the same key before the relayout replaces the callback
+        type: hashable
+
+        param: callback: What lays it out
+        type: function
+        """
+        if self.root is None:
+            callback()
+            return
+        self.waiting[key] = callback
+        if self.job is None:
+            self.job = self.root.after_idle(self.flush)
+
+    def flush(self):
+        self.job = None
+        waiting, self.waiting = self.waiting, {}
+        for callback in waiting.values():
+            callback()
+
+
+# The scheduler the whole GUI shares, main.py binds it to the root window
+scheduler = ResizeScheduler()
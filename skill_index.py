@@ -0,0 +1,111 @@
+"""
+In memory index of which open tasks need which skills
+
+Every skill gets a bit, a user's skills become one int with those bits set and
+each open task keeps the bits of the skills it requires. Finding the tasks a user
+can work on is then OR-ing together the task sets of the user's bits, and checking
+a single task is one AND, no SQL string comparisons needed.
+"""
+
+# The condition a task has to meet to still be worked on
+OPEN_TASK = "tasks.completed = 0 AND (tasks.user_id IS NULL OR tasks.user_id = '')"
+
+
+class SkillIndex:
+    def __init__(self):
+        self.bits = {}          # skill id -> bit position
+        self.skill_tasks = []   # bit position -> set of open task ids needing that skill
+        self.task_masks = {}    # task id -> bits of the skills it requires
+        self.user_masks = {}    # user name -> bits of the skills they have
+
+    def bit(self, skill_id):
+        """
+        Gives the bit position of a skill, new skills are given the next free bit
+        """
+        if skill_id not in self.bits:
+            self.bits[skill_id] = len(self.skill_tasks)
+            self.skill_tasks.append(set())
+        return self.bits[skill_id]
+
+    def mask(self, skill_ids):
+        mask = 0
+        for skill_id in skill_ids:
+            mask |= 1 << self.bit(skill_id)
+        return mask
+
+    def build(self, cur):
+        """
+        Loads every open task and every users skills from the database
+        """
+        self.__init__()
+        cur.execute("SELECT task_skills.task_id, task_skills.skill_id FROM task_skills"
+                    " JOIN tasks ON tasks.id = task_skills.task_id WHERE " + OPEN_TASK)
+        for task_id, skill_id in cur.fetchall():
+            bit = self.bit(skill_id)
+            self.skill_tasks[bit].add(task_id)
+            self.task_masks[task_id] = self.task_masks.get(task_id, 0) | (1 << bit)
+        cur.execute("SELECT users.name, user_skills.skill_id FROM user_skills"
+                    " JOIN users ON users.id = user_skills.user_id")
+        for name, skill_id in cur.fetchall():
+            self.user_masks[name] = self.user_masks.get(name, 0) | (1 << self.bit(skill_id))
+        return self
+
+    def add_task(self, task_id, skill_ids):
+        mask = self.mask(skill_ids)
+        if not mask:
+            return
+        self.task_masks[task_id] = self.task_masks.get(task_id, 0) | mask
+        for bit in self.iter_bits(mask):
+            self.skill_tasks[bit].add(task_id)
+
+    def remove_task(self, task_id):
+        """
+        Called once a task is assigned or completed so it stops being offered
+        """
+        for bit in self.iter_bits(self.task_masks.pop(task_id, 0)):
+            self.skill_tasks[bit].discard(task_id)
+
+    def add_user_skills(self, user, skill_ids):
+        self.user_masks[user] = self.user_masks.get(user, 0) | self.mask(skill_ids)
+
+    def can_work_on(self, user, task_id):
+        return self.task_masks.get(task_id, 0) & self.user_masks.get(user, 0) != 0
+
+    def match(self, mask):
+        """
+        param: mask: The bits of the skills to match against
+        type: int
+
+        return: task_ids: Every open task requiring at least one of the skills
+        type: set
+        """
+        task_ids = set()
+        for bit in self.iter_bits(mask):
+            task_ids |= self.skill_tasks[bit]
+        return task_ids
+
+    def tasks_for(self, user):
+        return sorted(self.match(self.user_masks.get(user, 0)))
+
+    def tasks_for_users(self, users):
+        """
+        Matches many users at once, users with the same skills are only matched once
+
+        return: tasks: user name -> sorted list of task ids
+        type: dict
+        """
+        by_mask = {}
+        tasks = {}
+        for user in users:
+            mask = self.user_masks.get(user, 0)
+            if mask not in by_mask:
+                by_mask[mask] = sorted(self.match(mask))
+            tasks[user] = by_mask[mask]
+        return tasks
+
+    @staticmethod
+    def iter_bits(mask):
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
@@ -0,0 +1,158 @@
+"""
+A searchable list of skills to tick, drawn on a canvas
+
+Only the rows that can be seen are drawn and the same canvas items are reused for
+them while scrolling, so the picker costs the same with 50 or 5,000 skills. What is
+ticked is a set of option indexes and the "You've Selected" text is redrawn once Tk
+is idle, not once per click.
+"""
+import heapq
+import tkinter as tk
+
+from resize import scheduler
+from skill_search import SkillSearch
+from text_layout import layout
+
+
+class SkillPicker:
+    ROW_HEIGHT = 24
+    BOX_SIZE = 12
+
+    def __init__(self, parent, options, height = 200, width = 300, print_sel = True, sel_label = "You've Selected: "):
+        self.options = options
+        self.width = width
+        self.print_sel = print_sel
+        self.sel_label = sel_label
+        self.search = SkillSearch(options)
+        self.rows = list(range(len(options)))   # row -> index of the option shown there
+        self.selected = set()                   # indexes of the ticked options
+        self.items = []                         # slot -> (box, check, text) canvas items
+        self.summary_job = None
+
+        self.framewidth = width
+        if print_sel:
+            #Measuring thousands of skills would hold up opening the tab, the widest
+            #one is almost always one of the longest
+            self.framewidth = layout.longest(heapq.nlargest(20, options, key=len)) + 25
+            if width/2 > self.framewidth:
+                self.framewidth = width/2
+
+        # Entry for searching
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add('write', self.on_search)
+        entry = tk.Entry(parent, textvariable=self.search_var, bg='#241E2B', fg='#FFF')
+        entry.pack(pady=0, padx=(0, width - self.framewidth), fill=tk.X)
+        entry.bind("<Return>", lambda event: self.add_option())
+
+        self.canvas = tk.Canvas(parent, bg='#241E2B', borderwidth=0, highlightthickness=0, height=height, width=width,
+                                yscrollincrement=self.ROW_HEIGHT)
+        self.canvas.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.summary = tk.Label(self.canvas, text="", bg='#241E2B', fg='white', justify='left')
+
+        self.canvas.bind("<Configure>", lambda event: scheduler.request(self, self.render))
+        self.canvas.bind("<MouseWheel>", self.on_mousewheel)
+        self.canvas.bind("<Button-1>", self.click)
+        self.update_scrollregion()
+
+    def get_selected(self):
+        """
+        return: skills: The ticked skills in the order they are listed
+        type: list
+        """
+        return [self.options[index] for index in sorted(self.selected)]
+
+    def update_scrollregion(self):
+        self.canvas.configure(scrollregion=(0, 0, self.framewidth, len(self.rows) * self.ROW_HEIGHT))
+        self.render()
+
+    def render(self):
+        """
+        Draws the rows in view, reusing the items of the rows that scrolled out
+        """
+        top = max(int(self.canvas.canvasy(0)) // self.ROW_HEIGHT, 0)
+        bottom = min(int(self.canvas.canvasy(self.canvas.winfo_height())) // self.ROW_HEIGHT + 1, len(self.rows))
+        slot = 0
+        for row in range(top, bottom):
+            self.draw_row(slot, row)
+            slot += 1
+        for box, check, text in self.items[slot:]:
+            for item in (box, check, text):
+                self.canvas.itemconfig(item, state='hidden')
+
+    def draw_row(self, slot, row):
+        index = self.rows[row]
+        y = row * self.ROW_HEIGHT + self.ROW_HEIGHT / 2
+        box = (4, y - self.BOX_SIZE / 2, 4 + self.BOX_SIZE, y + self.BOX_SIZE / 2)
+        check = (6, y, 9, y + 3, 14, y - 4)
+        check_state = 'normal' if index in self.selected else 'hidden'
+        if slot < len(self.items):
+            box_item, check_item, text_item = self.items[slot]
+            self.canvas.coords(box_item, *box)
+            self.canvas.coords(check_item, *check)
+            self.canvas.coords(text_item, 24, y)
+            self.canvas.itemconfig(box_item, state='normal')
+            self.canvas.itemconfig(check_item, state=check_state)
+            self.canvas.itemconfig(text_item, state='normal', text=self.options[index])
+        else:
+            self.items.append((
+                self.canvas.create_rectangle(*box, outline='#FFF', fill='#000'),
+                self.canvas.create_line(*check, fill='#FFF', width=2, state=check_state),
+                self.canvas.create_text(24, y, text=self.options[index], anchor='w', fill='#FFF'),
+            ))
+
+    def on_mousewheel(self, event):
+        self.canvas.focus_set()
+        self.canvas.yview_scroll(-1*(event.delta//120), "units")
+        self.render()
+
+    def click(self, event):
+        row = int(self.canvas.canvasy(event.y)) // self.ROW_HEIGHT
+        if event.x < self.framewidth and 0 <= row < len(self.rows):
+            self.toggle(self.rows[row])
+
+    def toggle(self, index):
+        if index in self.selected:
+            self.selected.remove(index)
+        else:
+            self.selected.add(index)
+        self.render()
+        if self.print_sel and self.summary_job is None:
+            self.summary_job = self.canvas.after_idle(self.print_selection)
+
+    def print_selection(self):
+        self.summary_job = None
+        text = ""
+        for skill in self.get_selected():
+            if text == "":
+                text = self.sel_label + skill
+            else:
+                text += ", " + skill
+        if text == "":
+            self.summary.place_forget()
+            return
+        lines = layout.wrap(text, "", self.width - self.framewidth)
+        if isinstance(lines, list):
+            text = "\n".join(lines)
+        else:
+            text = lines
+        self.summary.config(text=text)
+        self.summary.place(x=self.framewidth, y=0)
+
+    def on_search(self, *args):
+        self.rows = sorted(self.search.match(self.search_var.get()))
+        self.canvas.yview_moveto(0)
+        self.update_scrollregion()
+
+    def add_option(self):
+        """
+        Enter ticks the typed skill, adding it first if it isn't one of the options
+        """
+        option = self.search_var.get()
+        if option.strip() == "":
+            return
+        if option not in self.options:
+            self.options.append(option)
+            index = self.search.add(option)
+            self.rows.append(index)
+            self.update_scrollregion()
+        self.toggle(self.options.index(option))
@@ -0,0 +1,62 @@
+"""
+Finds which skills contain what was typed into the skill picker
+
+Every skill is lowercased once and split into the 3 letter pieces (trigrams) it
+contains. A search of 3 or more letters only checks the skills that have all of its
+trigrams, and when the user keeps typing the last results are narrowed down instead
+of searching everything again.
+"""
+
+
+class SkillSearch:
+    def __init__(self, options=()):
+        self.lowered = []       # index -> lowercase skill
+        self.trigrams = {}      # trigram -> set of indexes of the skills containing it
+        self.last_query = ""
+        self.last_result = set()
+        for option in options:
+            self.add(option)
+
+    def add(self, option):
+        """
+        Adds a skill to the end, it is shown by the current search if it matches
+
+        return: index: The position of the skill
+        type: int
+        """
+        index = len(self.lowered)
+        lowered = option.lower()
+        self.lowered.append(lowered)
+        for i in range(len(lowered) - 2):
+            self.trigrams.setdefault(lowered[i:i+3], set()).add(index)
+        if self.last_query in lowered:
+            self.last_result.add(index)
+        return index
+
+    def match(self, query):
+        """
+        param: query: What was typed, case doesn't matter
+        type: String
+
+        return: indexes: The positions of every skill containing the query
+        type: set
+        """
+        query = query.lower()
+        if query == "":
+            result = set(range(len(self.lowered)))
+        elif self.last_query != "" and self.last_query in query:
+            #Anything matching the longer query matched the shorter one too
+            result = {index for index in self.last_result if query in self.lowered[index]}
+        elif len(query) >= 3:
+            candidates = None
+            for i in range(len(query) - 2):
+                found = self.trigrams.get(query[i:i+3], set())
+                candidates = found if candidates is None else candidates & found
+                if not candidates:
+                    break
+            result = {index for index in candidates if query in self.lowered[index]}
+        else:
+            result = {index for index, lowered in enumerate(self.lowered) if query in lowered}
+        self.last_query = query
+        self.last_result = result
+        return set(result)
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the top of the repository, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import connections
+import database_loader
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connections.connect(str(tmp_path / "project.db"))
+    database_loader.setup(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    import query
+    store = query.ProjectStore(str(tmp_path / "project.db"))
+    yield store
+    store.close()
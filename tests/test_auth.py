@@ -0,0 +1,18 @@
+import auth
+from prefetch import Prefetcher
+
+
+def test_run_gives_false_when_the_work_raises():
+    # Without a Tk root the loader runs the work straight away
+    service = auth.AuthService(Prefetcher())
+    results = []
+    service.run(results.append, lambda: "stored")
+    service.run(results.append, lambda: 1 / 0)
+    assert results == ["stored", False]
+
+
+def test_passwords_are_checked_against_their_hash():
+    stored = auth.hash_password("secret")
+    assert auth.check_password("secret", stored)
+    assert not auth.check_password("wrong", stored)
+    assert not auth.check_password("secret", None)
@@ -0,0 +1,96 @@
+import sqlite3
+import threading
+
+import pytest
+
+import database_loader
+from test_counters import assert_counters_match
+
+
+def open_tasks(store, count):
+    return store.conn.execute("SELECT id, CAST(project_id AS INTEGER) FROM tasks"
+                              " WHERE completed = 0 AND user_id IS NULL ORDER BY id LIMIT ?", (count,)).fetchall()
+
+
+def assignee(store, task_id):
+    return store.conn.execute("SELECT user_id FROM tasks WHERE id = ?", (task_id,)).fetchone()[0]
+
+
+def completed(store, task_id):
+    return store.conn.execute("SELECT completed FROM tasks WHERE id = ?", (task_id,)).fetchone()[0]
+
+
+@pytest.fixture
+def filled(store):
+    database_loader.generate(store.conn, users=20, projects=4, tasks=200, seed=5)
+    # Assigning a task to "boom", or completing one called "boom", fails like a write the database refuses
+    store.conn.execute("CREATE TEMP TRIGGER fail BEFORE UPDATE ON tasks"
+                       " WHEN NEW.user_id = 'boom' OR (NEW.completed != 0 AND NEW.task = 'boom')"
+                       " BEGIN SELECT RAISE(ABORT, 'refused'); END")
+    store.user = store.conn.execute("SELECT name FROM users LIMIT 1").fetchone()[0]
+    return store
+
+
+def test_nested_batch_error_undoes_the_outer_batch(filled):
+    store = filled
+    (task_id, project), = open_tasks(store, 1)
+    store.index
+    store.cache.project_info(project)
+    with pytest.raises(RuntimeError):
+        with store.batch():
+            assert store.assign_task(store.user, task_id)
+            with store.batch():
+                store.create_proj(1, "Never kept")
+                raise RuntimeError("inner")
+    assert assignee(store, task_id) is None
+    assert store.conn.execute("SELECT COUNT(*) FROM projects WHERE project = 'Never kept'").fetchone()[0] == 0
+    # The in memory indexes and the cache may have seen the undone changes, they are thrown away
+    assert store._index is None
+    assert store.cache.groups == {}
+    assert_counters_match(store.conn)
+
+
+@pytest.mark.parametrize("bulk", ["assign_tasks", "complete_tasks"])
+def test_bulk_write_error_undoes_the_outer_batch(filled, bulk):
+    store = filled
+    (first, project), (second, other) = open_tasks(store, 2)
+    if bulk == "assign_tasks":
+        good, bad = (store.user, first), ("boom", second)
+    else:
+        store.conn.execute("UPDATE tasks SET task = 'boom' WHERE id = ?", (second,))
+        store.conn.commit()
+        good, bad = (project, first), (other, second)
+
+    with pytest.raises(sqlite3.Error):
+        with store.batch():
+            assert store.assign_task(store.user, first)
+            getattr(store, bulk)([bad])
+    assert assignee(store, first) is None
+    assert completed(store, second) == 0
+    assert_counters_match(store.conn)
+
+    # On its own the failed call gives False and keeps none of its changes
+    assert getattr(store, bulk)([good, bad]) is False
+    assert assignee(store, first) is None
+    assert completed(store, first) == 0
+    assert_counters_match(store.conn)
+
+
+def test_cache_is_invalidated_after_the_outer_commit(filled):
+    store = filled
+    (task_id, project), = open_tasks(store, 1)
+    before = store.cache.project_info(project)
+    with store.batch():
+        assert store.assign_tasks([(store.user, task_id)])
+        assert store.complete_tasks([(project, task_id)]) == 1
+        # Another thread still reads the committed rows and may cache them again
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(store.cache.project_info(project)))
+        thread.start()
+        thread.join()
+        assert seen == [before]
+        assert ("project", project) in store.cache.groups
+    assert ("project", project) not in store.cache.groups
+    after = store.cache.project_info(project)
+    assert after.completed == before.completed + 1
+    assert after.uncompleted == before.uncompleted - 1
@@ -0,0 +1,44 @@
+import threading
+
+from connections import ConnectionManager
+from prefetch import Prefetcher
+
+
+class FakeRoot:
+    # Nothing collects finished work, the tests wait on the futures themselves
+    def after(self, ms, function):
+        return "job"
+
+
+def test_worker_hands_its_connection_back(tmp_path):
+    manager = ConnectionManager(str(tmp_path / "project.db"))
+    loader = Prefetcher()
+    loader.bind(FakeRoot(), manager)
+    try:
+        future = loader.submit(lambda: manager.get().execute("SELECT COUNT(*) FROM users").fetchone()[0])
+        assert future.future.result(timeout=5) == 0
+        assert len(manager.pool) == 1
+        # The next piece of work takes the same connection instead of opening another
+        loader.submit(manager.get).future.result(timeout=5)
+        assert len(manager.open) == 1
+    finally:
+        loader.shutdown(wait=True)
+        manager.close_all()
+
+
+def test_pool_closes_what_it_cannot_keep(tmp_path):
+    manager = ConnectionManager(str(tmp_path / "project.db"), pool_size=1)
+    started = threading.Barrier(3)
+
+    def work():
+        with manager.connection():
+            started.wait(timeout=5)
+
+    threads = [threading.Thread(target=work) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(manager.pool) == 1
+    assert manager.open == manager.pool
+    manager.close_all()
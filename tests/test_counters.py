@@ -0,0 +1,51 @@
+import random
+
+import database_loader
+
+
+def counters(conn):
+    return conn.execute("SELECT id, uncompleted_tasks, completed_tasks, contributors FROM projects ORDER BY id").fetchall()
+
+
+def assert_counters_match(conn):
+    kept = counters(conn)
+    database_loader.refresh_counters(conn.cursor())
+    assert kept == counters(conn)
+
+
+def test_triggers_keep_counters_like_refresh_counters(conn):
+    database_loader.generate(conn, users=30, projects=5, tasks=300, seed=1)
+    assert_counters_match(conn)
+    cur = conn.cursor()
+    rng = random.Random(0)
+    users = [row[0] for row in cur.execute("SELECT name FROM users")] + ["", None]
+    task_ids = [row[0] for row in cur.execute("SELECT id FROM tasks")]
+
+    for i in range(50):
+        cur.execute("INSERT INTO tasks (project_id, task, user_id, completed) VALUES (?, ?, ?, ?)",
+                    (str(rng.randint(1, 5)), f"task {i}", rng.choice(users), rng.random() < 0.3))
+    assert_counters_match(conn)
+
+    for task_id in rng.sample(task_ids, 100):
+        cur.execute("UPDATE tasks SET user_id = ? WHERE id = ?", (rng.choice(users), task_id))
+    assert_counters_match(conn)
+
+    for task_id in rng.sample(task_ids, 50):
+        cur.execute("UPDATE tasks SET completed = 1 WHERE id = ?", (task_id,))
+    for task_id in rng.sample(task_ids, 30):
+        cur.execute("UPDATE tasks SET project_id = ? WHERE id = ?", (str(rng.randint(1, 5)), task_id))
+    assert_counters_match(conn)
+
+    for task_id in rng.sample(task_ids, 80):
+        cur.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+    assert_counters_match(conn)
+
+
+def test_store_assign_and_complete_keep_counters(store):
+    database_loader.generate(store.conn, users=20, projects=3, tasks=100, seed=2)
+    first, second = [row[0] for row in store.conn.execute("SELECT name FROM users LIMIT 2")]
+    open_tasks = store.conn.execute("SELECT id, project_id FROM tasks WHERE completed = 0 LIMIT 20").fetchall()
+    assert store.assign_tasks([(first, task_id) for task_id, _ in open_tasks[:10]])
+    assert store.assign_task(second, open_tasks[10][0])
+    assert store.complete_tasks([(project_id, task_id) for task_id, project_id in open_tasks[5:15]])
+    assert_counters_match(store.conn)
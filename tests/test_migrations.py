@@ -0,0 +1,23 @@
+import database_loader
+from test_counters import assert_counters_match
+
+
+def test_repeated_names_get_a_free_suffix_and_keep_their_tasks(conn):
+    # A database from before user names were unique
+    conn.execute("DROP INDEX idx_users_name")
+    conn.executemany("INSERT INTO users (id, name) VALUES (?, ?)", [(1, "bob"), (2, "bob-3"), (3, "bob"), (4, "ann")])
+    conn.executemany("INSERT INTO projects (id, owner, project) VALUES (?, ?, ?)", [(1, 1, "First"), (2, 3, "Second")])
+    conn.executemany("INSERT INTO tasks (id, project_id, task, user_id, completed) VALUES (?, ?, ?, ?, 0)",
+                     [(1, "1", "a", "bob"), (2, "2", "b", "bob"), (3, "2", "c", "ann")])
+    conn.execute("PRAGMA user_version = 7")
+    conn.commit()
+
+    database_loader.setup(conn)
+
+    names = dict(conn.execute("SELECT id, name FROM users"))
+    assert names == {1: "bob", 2: "bob-3", 3: "bob-3-2", 4: "ann"}
+    # The task in the project the renamed user owns goes with them, the rest stay with the first
+    assignees = dict(conn.execute("SELECT id, user_id FROM tasks"))
+    assert assignees == {1: "bob", 2: "bob-3-2", 3: "ann"}
+    assert conn.execute("SELECT COUNT(*) FROM pragma_index_list('users') WHERE name = 'idx_users_name' AND \"unique\"").fetchone()[0] == 1
+    assert_counters_match(conn)
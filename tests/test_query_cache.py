@@ -0,0 +1,23 @@
+import database_loader
+
+
+def cached(store, kind, project):
+    return (kind, project) in store.cache.groups
+
+
+def test_assigning_only_invalidates_its_project(store):
+    database_loader.generate(store.conn, users=20, projects=4, tasks=200, seed=3)
+    user = store.conn.execute("SELECT name FROM users LIMIT 1").fetchone()[0]
+    task_id, project = store.conn.execute("SELECT id, CAST(project_id AS INTEGER) FROM tasks"
+                                          " WHERE completed = 0 AND user_id IS NULL LIMIT 1").fetchone()
+    other = next(p for p in range(1, 5) if p != project)
+
+    for assign in (lambda: store.assign_task(user, task_id), lambda: store.assign_tasks([(user, task_id)])):
+        for p in (project, other):
+            store.cache.project_info(p)
+            store.cache.project_tasks(p, limit=4)
+        assert assign()
+        assert not cached(store, "project", project)
+        assert not cached(store, "project_tasks", project)
+        assert cached(store, "project", other)
+        assert cached(store, "project_tasks", other)
@@ -0,0 +1,25 @@
+import query
+
+
+def add_projects(store, names):
+    store.conn.execute("INSERT INTO users (name) VALUES ('owner')")
+    store.conn.executemany("INSERT INTO projects (project, description, owner) VALUES (?, '', 1)",
+                           [(name,) for name in names])
+    store.conn.commit()
+
+
+def test_short_words(store):
+    add_projects(store, ["api a", "api gateway", "apple", "data pipeline"])
+    names = lambda text: sorted(name for _, name in store.search_projects(text))
+    assert names("ap") == ["api a", "api gateway", "apple"]
+    # One letter matches whole words only, and is skipped while the next word is being typed
+    assert names("a") == ["api a"]
+    assert names("api g") == ["api a", "api gateway"]
+    assert names("api ga") == ["api gateway"]
+
+
+def test_only_the_first_candidates_are_ranked(store, monkeypatch):
+    monkeypatch.setattr(query, "SEARCH_CANDIDATES", 3)
+    add_projects(store, ["web %d" % i for i in range(10)])
+    assert sorted(name for _, name in store.search_projects("web")) == ["web 0", "web 1", "web 2"]
+    assert len(store.search_projects("web", user="owner")) == 10
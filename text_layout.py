@@ -0,0 +1,94 @@
+"""
+Remembers how text was measured and wrapped so the GUI doesn't ask Tk again
+
+Every font keeps the width of each word it has measured. Wrapping a paragraph is
+then adding up widths that are already known instead of measuring every possible
+line, and whole wrapped paragraphs are kept so redrawing the same card is a lookup.
+"""
+from collections import OrderedDict
+from tkinter import font as tkFont
+
+
+class TextLayout:
+    def __init__(self, max_layouts=4096, max_words=50000):
+        self.max_layouts = max_layouts
+        self.max_words = max_words
+        self.layouts = OrderedDict()    # (text, font, max_width, max_lines) -> wrapped lines, oldest first
+        self.widths = {}                # font -> {text: width}
+        self.font_keys = {}             # Tk font name -> what the font actually looks like
+
+    def font_key(self, font):
+        """
+        Fonts made separately with the same family, size and style measure the same, so they share a key
+        """
+        if font == "":
+            font = tkFont.nametofont("TkDefaultFont")
+        name = str(font)
+        if name not in self.font_keys:
+            self.font_keys[name] = tuple(sorted(font.actual().items()))
+        return self.font_keys[name]
+
+    def measure(self, font, text, key=None):
+        if font == "":
+            font = tkFont.nametofont("TkDefaultFont")
+        if key is None:
+            key = self.font_key(font)
+        widths = self.widths.setdefault(key, {})
+        if text not in widths:
+            if len(widths) >= self.max_words:
+                widths.clear()
+            widths[text] = font.measure(text)
+        return widths[text]
+
+    def wrap(self, text, font, max_width, max_lines = None):
+        """
+        Splits text into lines that fit in max_width
+
+        return: lines: A list of lines, or the line itself if there is only one.
+        If there are more than max_lines the last line kept ends with "..."
+        type: list or String
+        """
+        if font == "":
+            font = tkFont.nametofont("TkDefaultFont")
+        key = self.font_key(font)
+        layout_key = (text, key, max_width, max_lines)
+        if layout_key in self.layouts:
+            self.layouts.move_to_end(layout_key)
+            lines = self.layouts[layout_key]
+        else:
+            lines = self._wrap(text, font, key, max_width, max_lines)
+            self.layouts[layout_key] = lines
+            if len(self.layouts) > self.max_layouts:
+                self.layouts.popitem(last=False)
+        if len(lines) == 1: return lines[0]
+        return list(lines)
+
+    def _wrap(self, text, font, key, max_width, max_lines):
+        space = self.measure(font, ' ', key)
+        lines = []
+        line = ''
+        width = 0
+        for word in text.split():
+            word_width = self.measure(font, word, key)
+            #A word that doesn't fit on its own still gets a line instead of looping forever
+            if line and width + word_width > max_width:
+                lines.append(line)
+                line = ''
+                width = 0
+            line += word + ' '
+            width += word_width + space
+        if line:
+            lines.append(line)
+        if max_lines != None and len(lines) > max_lines:
+            lines = lines[0:max_lines]
+            lines[max_lines-1] = lines[max_lines-1][0:-1]
+            lines[max_lines-1] += "..."
+        return lines
+
+    def longest(self, texts, font = ""):
+        key = self.font_key(font)
+        return max((self.measure(font, text, key) for text in texts), default=0)
+
+
+# The layout cache the whole GUI shares
+layout = TextLayout()
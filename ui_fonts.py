@@ -0,0 +1,42 @@
+"""
+The fonts the GUI draws with, made once and shared
+
+Making a tkFont.Font allocates a new Tcl font every time, so the canvas drawing code
+asks here for one of the styles below instead. Each font is made the first time it is
+asked for (or all at once by load) and its measurements are started in the text layout cache.
+"""
+from tkinter import font as tkFont
+from text_layout import layout
+
+STYLES = {
+    "title": ("Arial", 18, 'bold', 'underline'),    # Project names
+    "heading": ("Arial", 12, 'bold'),               # Project stats and task names
+    "body": ("Arial", 12),                          # Project descriptions
+    "small": ("Arial", 10, 'bold'),                 # Task details
+    "notice": ("Arial", 20, 'bold'),                # Messages shown instead of a list
+}
+
+_fonts = {}
+
+
+def get(style):
+    """
+    param: style: One of the names in STYLES
+    type: String
+
+    return: font: The shared font of that style
+    type: tkFont.Font
+    """
+    if style not in _fonts:
+        font = tkFont.Font(font=STYLES[style])
+        layout.measure(font, ' ')
+        _fonts[style] = font
+    return _fonts[style]
+
+
+def load():
+    """
+    Makes every font up front, this needs a Tk root to exist
+    """
+    for style in STYLES:
+        get(style)
@@ -1,14 +1,13 @@
-import bcrypt
-import sqlite3
+import query
+from auth import check_password
 
-conn = sqlite3.connect('project.db')
-cur = conn.cursor()
 def verify_user(user, password=None):
+    # The connection belongs to the shared store, it stays open for the next call
+    cur = query.store.conn.cursor()
     cur.execute("SELECT password FROM users WHERE name=?", (user,))
     result = cur.fetchone()
-    conn.close()
     
     if not result: return False
     if password is None: return True
     
-    return bcrypt.checkpw(password.encode('utf-8'), result[0].encode('utf-8'))
+    return check_password(password, result[0])